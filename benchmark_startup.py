@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Benchmark sensor entity setup for a synthetic inverter fleet.
+
+Builds every sensor entity for a fleet of fake inverters the way the sensor
+platform does at startup, then reads each entity's state and device info once,
+as Home Assistant does when adding it. Requires homeassistant to be installed.
+"""
+import argparse
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from custom_components.solis_cloud.aggregate import compute_aggregates
+from custom_components.solis_cloud.sensor import SENSOR_KEY_NAMES, SENSOR_KEYS, _build_entities
+
+
+def synthetic_fleet(inverters, stations):
+    """Return inverter records carrying every sensor key."""
+    records = []
+    for index in range(inverters):
+        record = {key: float(index % 97) for key in SENSOR_KEYS}
+        record.update({
+            "id": str(100000 + index),
+            "inverterSn": f"SN{index:08d}",
+            "stationName": f"Station {index % stations}",
+            "state": "1",
+            "dataTimestamp": str(1700000000000 + index),
+        })
+        records.append(record)
+    return records
+
+
+def main():
+    """Time entity construction and first state reads."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--inverters", type=int, default=500)
+    parser.add_argument("--stations", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    records = synthetic_fleet(args.inverters, args.stations)
+    coordinator = SimpleNamespace(
+        data={
+            "records": records,
+            "index": {record["inverterSn"]: record for record in records},
+            "aggregates": compute_aggregates(records),
+            "energy": {},
+            "unchanged": set(),
+            "unavailable": set(),
+        },
+        sensor_keys=set(SENSOR_KEY_NAMES),
+        config_generation=0,
+        last_update_success=True,
+        transport=SimpleNamespace(uploads=None),
+    )
+    config_entry = SimpleNamespace(entry_id="benchmark")
+
+    build_times = []
+    read_times = []
+    for _ in range(args.rounds):
+        start = time.perf_counter()
+        entities, _ = _build_entities(coordinator, config_entry, {})
+        build_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for entity in entities:
+            entity.device_info
+            entity.native_value
+        read_times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    entities, _ = _build_entities(coordinator, config_entry, {})
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print("=" * 60)
+    print(f"Inverters: {args.inverters}  Stations: {args.stations}")
+    print(f"Entities:  {len(entities)}")
+    print(f"Build:     {min(build_times) * 1000:.1f} ms (best of {args.rounds})")
+    print(f"First read: {min(read_times) * 1000:.1f} ms (best of {args.rounds})")
+    print(f"Peak allocated while building: {peak / 1024 / 1024:.1f} MiB")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
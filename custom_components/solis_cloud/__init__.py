@@ -2,57 +2,87 @@
 from __future__ import annotations
 
 import logging
-from datetime import timedelta
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
+from homeassistant.const import CONF_HOST, CONF_PORT, Platform
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-
-from .const import DOMAIN
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.typing import ConfigType
+
+from .const import (
+    CONF_SERIAL,
+    CONF_SLAVE,
+    CONF_STATION_NAME,
+    CONF_TRANSPORT,
+    DATA_TOPOLOGY,
+    DOMAIN,
+    TRANSPORT_MODBUS,
+)
 from .api import SolisCloudAPI
+from .coordinator import SolisCloudCoordinator
+from .modbus import SolisModbusTransport
+from .transport import InverterTransport
+from .services import async_setup_services
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: list[Platform] = [Platform.SENSOR]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Solis Cloud services."""
+    await async_setup_services(hass)
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Solis Cloud from a config entry."""
     hass.data.setdefault(DOMAIN, {})
 
-    api = SolisCloudAPI(
-        key_id=entry.data["key_id"],
-        secret=entry.data["secret"],
-        username=entry.data["username"],
-    )
-
-    async def async_update_data():
-        """Fetch data from API."""
-        try:
-            return await hass.async_add_executor_job(api.get_inverter_data)
-        except Exception as err:
-            raise UpdateFailed(f"Error communicating with API: {err}") from err
-
-    coordinator = DataUpdateCoordinator(
-        hass,
-        _LOGGER,
-        name=DOMAIN,
-        update_method=async_update_data,
-        update_interval=timedelta(minutes=5),
-    )
+    transport: InverterTransport
+    if entry.data.get(CONF_TRANSPORT) == TRANSPORT_MODBUS:
+        transport = SolisModbusTransport(
+            host=entry.data[CONF_HOST],
+            port=entry.data[CONF_PORT],
+            slave=entry.data[CONF_SLAVE],
+            inverter_sn=entry.data[CONF_SERIAL],
+            station_name=entry.data[CONF_STATION_NAME],
+        )
+    else:
+        api = SolisCloudAPI(
+            key_id=entry.data["key_id"],
+            secret=entry.data["secret"],
+            username=entry.data["username"],
+        )
+        api.prime_stations(hass.data.get(DATA_TOPOLOGY, {}).pop(entry.data["key_id"], None))
+        transport = api
+
+    coordinator = SolisCloudCoordinator(hass, entry, transport)
+    await coordinator.async_apply_options(entry.options)
+    await coordinator.async_load_state()
 
     await coordinator.async_config_entry_first_refresh()
 
     hass.data[DOMAIN][entry.entry_id] = coordinator
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
     return True
 
 
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply changed options without reloading the entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    await coordinator.async_apply_options(entry.options)
+    await coordinator.async_request_refresh()
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        await coordinator.async_shutdown()
 
     return unload_ok
@@ -0,0 +1,179 @@
+"""Station and fleet aggregates for the Solis Cloud integration."""
+from __future__ import annotations
+
+from datetime import date
+from typing import Any
+
+from .values import as_float, power_watts, to_kwh
+
+# Keys summed across inverters
+SUM_KEYS = ("pac", "eToday", "gridSellTodayEnergy", "batteryPower")
+
+# Summed power keys, normalised to watts by their "<key>Str" unit first
+POWER_SUM_KEYS = ("pac", "batteryPower")
+
+# Counters that reset around midnight, each inverter at its own moment; their
+# totals add up what every inverter gained today, see DailyTotals
+DAILY_SUM_KEYS = ("eToday", "gridSellTodayEnergy")
+
+# Battery SOC is averaged, weighted by battery capacity when the API reports it
+SOC_KEY = "batteryCapacitySoc"
+CAPACITY_KEY = "batteryCapacity"
+
+AGGREGATE_KEYS = SUM_KEYS + (SOC_KEY,)
+
+_NUM_SUMS = len(SUM_KEYS)
+
+
+class _Accumulator:
+    """Running column totals for one aggregation group."""
+
+    __slots__ = ("sums", "counts", "soc_weighted", "soc_weight", "inverters")
+
+    def __init__(self) -> None:
+        self.sums = [0.0] * _NUM_SUMS
+        self.counts = [0] * _NUM_SUMS
+        self.soc_weighted = 0.0
+        self.soc_weight = 0.0
+        self.inverters = 0
+
+    def add(self, row: list[float | None], soc: float | None, weight: float) -> None:
+        """Add one inverter's row of values."""
+        self.inverters += 1
+        sums = self.sums
+        counts = self.counts
+        for index, value in enumerate(row):
+            if value is not None:
+                sums[index] += value
+                counts[index] += 1
+        if soc is not None and weight > 0:
+            self.soc_weighted += soc * weight
+            self.soc_weight += weight
+
+    def result(self) -> dict[str, Any]:
+        """Return the aggregated values keyed by API key."""
+        values: dict[str, Any] = {
+            key: round(self.sums[index], 3) if self.counts[index] else None
+            for index, key in enumerate(SUM_KEYS)
+        }
+        values[SOC_KEY] = (
+            round(self.soc_weighted / self.soc_weight, 1) if self.soc_weight else None
+        )
+        values["inverterCount"] = self.inverters
+        return values
+
+
+class DailyTotals:
+    """Station and fleet totals of the daily counters that never drop during a day.
+
+    Each inverter adds what its counter gained since the previous poll, or its
+    whole value after it reset, so inverters that reset at different moments
+    after midnight, or join and leave a group, neither lower a total nor count
+    yesterday's energy again. The totals restart from 0 at local midnight.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty totals."""
+        self._day: str | None = None
+        # inverter_sn -> {key: last value in kWh}
+        self._last: dict[str, dict[str, float]] = {}
+        # station name -> {key: kWh since midnight}, and the same for the fleet
+        self._stations: dict[str, dict[str, float]] = {}
+        self._fleet: dict[str, float] = {}
+
+    def load(self, stored: dict[str, Any] | None) -> None:
+        """Restore state saved by as_dict."""
+        if stored:
+            self._day = stored.get("day")
+            self._last = stored.get("last", {})
+            self._stations = stored.get("stations", {})
+            self._fleet = stored.get("fleet", {})
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state to persist."""
+        return {
+            "day": self._day,
+            "last": self._last,
+            "stations": self._stations,
+            "fleet": self._fleet,
+        }
+
+    def process(self, records: list[dict[str, Any]], today: date) -> bool:
+        """Add what the changed records gained; return True when a total moved."""
+        moved = False
+        day = today.isoformat()
+        if day != self._day:
+            self._day = day
+            self._stations = {}
+            self._fleet = {}
+            moved = True
+
+        for record in records:
+            inverter_sn = record.get("inverterSn")
+            if not inverter_sn:
+                continue
+            last = self._last.setdefault(inverter_sn, {})
+            station = self._stations.setdefault(record.get("stationName", "Solis"), {})
+            for key in DAILY_SUM_KEYS:
+                value = as_float(record.get(key))
+                if value is None:
+                    continue
+                kwh = to_kwh(record, key, value)
+                previous = last.get(key)
+                last[key] = kwh
+                gain = kwh - previous if previous is not None and kwh >= previous else kwh
+                if gain:
+                    station[key] = station.get(key, 0.0) + gain
+                    self._fleet[key] = self._fleet.get(key, 0.0) + gain
+                    moved = True
+        return moved
+
+    def total(self, station_name: str | None, key: str) -> float:
+        """Return today's total of a station, or of the fleet for None."""
+        totals = self._fleet if station_name is None else self._stations.get(station_name, {})
+        return round(totals.get(key, 0.0), 3)
+
+
+def compute_aggregates(
+    records: list[dict[str, Any]], daily: DailyTotals | None = None
+) -> dict[str, Any]:
+    """Compute per-station and fleet totals in a single pass over the records.
+
+    Each record contributes one row of numeric values which is added to both
+    its station's accumulator and the fleet accumulator, so the cost is
+    O(records * keys) regardless of how many aggregate entities exist. With
+    daily, the daily counters report its totals instead of the plain sums.
+    """
+    fleet = _Accumulator()
+    stations: dict[str, _Accumulator] = {}
+
+    for record in records:
+        row = [
+            power_watts(record, key) if key in POWER_SUM_KEYS else as_float(record.get(key))
+            for key in SUM_KEYS
+        ]
+        soc = as_float(record.get(SOC_KEY))
+        capacity = as_float(record.get(CAPACITY_KEY))
+        # Without a reported capacity every battery counts equally
+        weight = capacity if capacity is not None and capacity > 0 else 1.0
+
+        station_name = record.get("stationName", "Solis")
+        station = stations.get(station_name)
+        if station is None:
+            station = stations[station_name] = _Accumulator()
+
+        station.add(row, soc, weight)
+        fleet.add(row, soc, weight)
+
+    def result(acc: _Accumulator, station_name: str | None) -> dict[str, Any]:
+        values = acc.result()
+        if daily is not None:
+            for key in DAILY_SUM_KEYS:
+                if values[key] is not None:
+                    values[key] = daily.total(station_name, key)
+        return values
+
+    return {
+        "stations": {name: result(acc, name) for name, acc in stations.items()},
+        "fleet": result(fleet, None),
+    }
@@ -4,43 +4,164 @@ import hmac
 import base64
 import json
 import logging
+import math
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from typing import Any
 
 import requests
 
+from .const import API_REQUESTS_PER_SECOND
+from .control import (
+    CONTROL_ENDPOINT,
+    READ_ENDPOINT,
+    VERIFY_DELAY,
+    ControlQueue,
+)
+from .freshness import UploadTracker, data_timestamp
+from .profiling import Profiler
+from .recorder import ResponseRecorder
+from .scheduler import SCHEDULER_TICK, InverterScheduler
+from .transport import InverterTransport
+from .windows import PollPlan
+
 _LOGGER = logging.getLogger(__name__)
 
+PAGE_SIZE = 100
+
+# Station and inverter lists are refreshed this often, in seconds
+TOPOLOGY_INTERVAL = 3600
+
+# Energy report endpoints: granularity -> (endpoint, period payload key)
+REPORT_ENDPOINTS = {
+    "month": ("/v1/api/inverterMonth", "month"),
+    "year": ("/v1/api/inverterYear", "year"),
+    "all": ("/v1/api/inverterAll", None),
+}
+
+
+class RequestPacer:
+    """Space request starts across threads to a rate per second."""
+
+    def __init__(self, rate: float) -> None:
+        """Initialize the pacer; the first request starts at once."""
+        self._interval = 1.0 / rate
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        """Block until the next request may start."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self._interval
+        if start > now:
+            time.sleep(start - now)
 
-class SolisCloudAPI:
+
+class SolisCloudAPI(InverterTransport):
     """Solis Cloud API client."""
 
-    def __init__(self, key_id: str, secret: str, username: str = "") -> None:
+    def __init__(
+        self,
+        key_id: str,
+        secret: str,
+        username: str = "",
+        profiler: Profiler | None = None,
+    ) -> None:
         """Initialize the API client."""
+        super().__init__(profiler or Profiler(key_id[:10]))
         self.key_id = key_id
         self.secret = secret
         self.username = username
         self.base_url = "https://www.soliscloud.com:13333"
+        # Station list handed over from validation, used by the next fetch
+        self._pending_stations: list[dict[str, Any]] | None = None
+        self.uploads = UploadTracker()
+        self.scheduler = InverterScheduler(self.scan_interval)
+        self.control = ControlQueue()
+        # Requests made, detail fetches among them, and the detail fetches
+        # made when the current poll plan started
+        self.request_count = 0
+        self.detail_count = 0
+        self._request_lock = threading.Lock()
+        # Polling, setting writes and exports share the API's rate limit
+        self._pacer = RequestPacer(API_REQUESTS_PER_SECOND)
+        self._plan_details = 0
+        # Captures raw responses while set
+        self.recorder: ResponseRecorder | None = None
+        self._topology: list[dict[str, Any]] | None = None
+        self._topology_time = 0.0
+        self._station_inverters: dict[Any, list[dict[str, Any]]] = {}
         self._session = requests.Session()
+        self._pool: ThreadPoolExecutor | None = None
+        self._pool_size = 0
+
+    @property
+    def tick_interval(self) -> float:
+        """Tick often enough to service the per-inverter timers."""
+        return min(self.scan_interval, SCHEDULER_TICK)
+
+    def set_scan_interval(self, seconds: float) -> None:
+        """Set the per-inverter polling interval."""
+        super().set_scan_interval(seconds)
+        self.scheduler.interval = seconds
+
+    def max_poll_interval(self) -> float:
+        """Return the longest interval of the scheduler, planned ones included."""
+        return self.scheduler.max_interval()
+
+    def start_recording(self, recorder: ResponseRecorder) -> None:
+        """Capture the responses of the next polls.
+
+        The first recorded poll lists the stations and fetches every
+        inverter, so a replay of the capture starts from a complete fleet.
+        """
+        self.recorder = recorder
+        self._topology_time = float("-inf")
+        for inverter_sn in self.inverter_serials:
+            self.scheduler.expedite(inverter_sn, 0.0)
+
+    def set_poll_plan(self, plan: PollPlan | None) -> None:
+        """Poll faster inside the plan's windows, within its request budget."""
+        self.scheduler.plan = plan
+        self.scheduler.paused_until = 0.0
+        self._plan_details = self.detail_count
+
+    def overhead_requests(self, seconds: float) -> int:
+        """Return the station and inverter list requests expected in seconds."""
+        refreshes = math.ceil(seconds / TOPOLOGY_INTERVAL)
+        return refreshes * (1 + max(len(self._station_inverters), 1))
 
     def _post(self, endpoint: str, payload: dict) -> dict[str, Any]:
         """Make an authenticated POST request to the Solis Cloud API."""
         url = f"{self.base_url}{endpoint}"
-        body = json.dumps(payload, separators=(',', ':'))
-        content_md5 = base64.b64encode(
-            hashlib.md5(body.encode('utf-8')).digest()
-        ).decode('utf-8')
+        profiler = self.profiler
+        with self._request_lock:
+            self.request_count += 1
+        with profiler.span("post.pace"):
+            self._pacer.wait()
+        with profiler.span("post.serialise"):
+            body = json.dumps(payload, separators=(',', ':'))
+        with profiler.span("post.md5"):
+            content_md5 = base64.b64encode(
+                hashlib.md5(body.encode('utf-8')).digest()
+            ).decode('utf-8')
         date_str = datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S GMT")
 
         # HMAC-SHA1 signature (content type without charset)
-        string_to_sign = f"POST\n{content_md5}\napplication/json\n{date_str}\n{endpoint}"
-        signature = base64.b64encode(
-            hmac.new(
-                self.secret.encode('utf-8'),
-                msg=string_to_sign.encode('utf-8'),
-                digestmod=hashlib.sha1,
-            ).digest()
-        ).decode('utf-8')
+        with profiler.span("post.hmac"):
+            string_to_sign = f"POST\n{content_md5}\napplication/json\n{date_str}\n{endpoint}"
+            signature = base64.b64encode(
+                hmac.new(
+                    self.secret.encode('utf-8'),
+                    msg=string_to_sign.encode('utf-8'),
+                    digestmod=hashlib.sha1,
+                ).digest()
+            ).decode('utf-8')
 
         headers = {
             "Content-Type": "application/json;charset=UTF-8",
@@ -50,59 +171,318 @@ class SolisCloudAPI:
         }
 
         _LOGGER.debug("POST %s", endpoint)
-        response = self._session.post(url, data=body, headers=headers, timeout=30)
-        response.raise_for_status()
+        with profiler.span("post.network"):
+            response = self._session.post(url, data=body, headers=headers, timeout=self.timeout)
+            response.raise_for_status()
 
-        data = response.json()
+        with profiler.span("post.parse"):
+            data = response.json()
+        if self.recorder is not None:
+            self.recorder.record(endpoint, payload, data)
         if data.get("success") is not True:
             raise SolisAPIError(data.get("message", "Unknown error"))
 
         return data.get("data", {})
 
+    def validate_credentials(self) -> dict[str, Any]:
+        """Check the credentials with a single signed station list request.
+
+        Returns the station count reported by the API and the first page of
+        stations, which can be passed to prime_stations.
+        """
+        station_data = self._post(
+            "/v1/api/userStationList", {"pageNo": "1", "pageSize": str(PAGE_SIZE)}
+        )
+        page = station_data.get("page", {})
+        stations = page.get("records", [])
+        total = int(page.get("total", len(stations)) or 0)
+        return {"total": total, "stations": stations if total <= len(stations) else None}
+
+    def prime_stations(self, stations: list[dict[str, Any]] | None) -> None:
+        """Use an already fetched station list for the next inverter fetch."""
+        self._pending_stations = stations
+
+    def get_stations(self) -> list[dict[str, Any]]:
+        """Get every station of the account, following pagination."""
+        if self._pending_stations is not None:
+            stations, self._pending_stations = self._pending_stations, None
+            return stations
+
+        return list(self._iter_pages("/v1/api/userStationList", {}))
+
+    def _iter_pages(
+        self, endpoint: str, payload: dict[str, Any], page_size: int = PAGE_SIZE
+    ) -> Iterator[dict[str, Any]]:
+        """Yield the records of a paginated list endpoint, page by page."""
+        page_no = 1
+        seen = 0
+        while True:
+            data = self._post(
+                endpoint,
+                {**payload, "pageNo": str(page_no), "pageSize": str(page_size)},
+            )
+            page = data.get("page", {})
+            records = page.get("records", [])
+            yield from records
+            seen += len(records)
+            total = int(page.get("total", 0) or 0)
+            if not records or seen >= total:
+                return
+            page_no += 1
+
+    def get_all_inverters(self) -> Iterator[dict[str, Any]]:
+        """Yield every inverter of the account from the paginated inverter list."""
+        return self._iter_pages("/v1/api/inverterList", {})
+
+    def get_inverter_report(
+        self, inverter: dict[str, Any], granularity: str, period: str
+    ) -> list[dict[str, Any]]:
+        """Get an inverter's energy report.
+
+        granularity "month" returns one row per day of the month period
+        (yyyy-MM), "year" one row per month of the year period (yyyy) and
+        "all" one row per year; period is ignored for "all".
+        """
+        endpoint, period_key = REPORT_ENDPOINTS[granularity]
+        payload = {
+            "id": str(inverter["id"]),
+            "sn": str(inverter["inverterSn"]),
+            "money": inverter.get("money") or "CNY",
+        }
+        if period_key:
+            payload[period_key] = period
+        data = self._post(endpoint, payload)
+        return data if isinstance(data, list) else []
+
     def get_inverter_data(self) -> dict[str, Any]:
-        """Get inverter data from Solis Cloud."""
-        station_data = self._post("/v1/api/userStationList", {"pageNo": "1", "pageSize": "10"})
-        stations = station_data.get("page", {}).get("records", [])
+        """Get inverter data from Solis Cloud.
+
+        Only inverters whose timer is due are fetched, the others keep their
+        previous record. An inverter whose fetch fails is reported in
+        "unavailable" and backed off without failing the whole refresh.
+        """
+        now = time.time()
+        all_inverters = self._get_topology(now)
+        if self.excluded_serials:
+            all_inverters = [
+                inv for inv in all_inverters
+                if inv.get("inverterSn") not in self.excluded_serials
+            ]
+
+        plan = self.scheduler.plan
+        if (
+            plan is not None
+            and plan.budget is not None
+            and now < plan.end
+            and self.scheduler.paused_until < plan.end
+            and self.detail_count - self._plan_details >= plan.budget
+        ):
+            _LOGGER.warning(
+                "Daily budget of %d detail requests used up, pausing polling until tomorrow",
+                plan.budget,
+            )
+            self.scheduler.paused_until = plan.end
+
+        if self.control:
+            self._send_commands(all_inverters, now)
+
+        unchanged: set[str] = set()
+        records = self._fetch_details(all_inverters, now, unchanged)
+        unavailable = {
+            inv["inverterSn"] for inv in all_inverters
+            if inv.get("inverterSn") and self.scheduler.failing(inv["inverterSn"])
+        }
+
+        _LOGGER.debug(
+            "Retrieved %d inverter(s), %d unchanged, %d unavailable",
+            len(records), len(unchanged), len(unavailable),
+        )
+        return {"records": records, "unchanged": unchanged, "unavailable": unavailable}
+
+    def _get_topology(self, now: float) -> list[dict[str, Any]]:
+        """Return the listed inverters, refreshing the lists periodically.
+
+        A station whose inverter list cannot be fetched keeps its previous
+        inverters, so a transient error does not drop them.
+        """
+        if self._topology is not None and now - self._topology_time < TOPOLOGY_INTERVAL:
+            return self._topology
+
+        try:
+            with self.profiler.span("fetch.stations"):
+                stations = self.get_stations()
+        except Exception:
+            if self._topology is None:
+                raise
+            _LOGGER.warning("Error refreshing station list, keeping the previous one")
+            self._topology_time = now
+            return self._topology
 
         if not stations:
             _LOGGER.warning("No stations found for this user")
-            return {"records": []}
 
-        all_inverters = []
+        station_inverters: dict[Any, list[dict[str, Any]]] = {}
         for station in stations:
             station_id = station.get("id")
             station_name = station.get("stationName", "Solis")
 
-            inverters = self._get_station_inverters(station_id)
+            try:
+                with self.profiler.span("fetch.inverter_list"):
+                    inverters = self._get_station_inverters(station_id)
+            except Exception as e:
+                _LOGGER.warning("Error getting inverters for station %s: %s", station_id, e)
+                inverters = self._station_inverters.get(station_id, [])
             for inv in inverters:
                 inv["stationName"] = station_name
-                inverter_id = inv.get("id")
-                inverter_sn = inv.get("inverterSn")
-                if inverter_id and inverter_sn:
-                    details = self._get_inverter_detail(inverter_id, inverter_sn)
-                    if details:
-                        inv.update(details)
-            all_inverters.extend(inverters)
+            station_inverters[station_id] = inverters
+
+        all_inverters = [
+            inv for inverters in station_inverters.values() for inv in inverters
+        ]
+        self.inverter_serials = [
+            inv["inverterSn"] for inv in all_inverters if inv.get("inverterSn")
+        ]
+        self.scheduler.forget(set(self.inverter_serials))
+        self._station_inverters = station_inverters
+        self._topology = all_inverters
+        self._topology_time = now
+        return all_inverters
+
+    def _send_commands(self, inverters: list[dict[str, Any]], now: float) -> None:
+        """Send queued setting writes within this tick's request budget.
+
+        Detail fetches due this tick take their share of the budget first;
+        at least one write is sent per tick so the queue always drains.
+        """
+        due = sum(
+            1 for inv in inverters
+            if inv.get("inverterSn") and self.scheduler.due(inv["inverterSn"], now)
+        )
+        budget = int(API_REQUESTS_PER_SECOND * self.tick_interval) - due
+        for command in self.control.take(max(budget, 1)):
+            try:
+                with self.profiler.span("control.write"):
+                    self.write_setting(command.inverter_sn, command.cid, command.value)
+            except Exception as e:  # pylint: disable=broad-except
+                _LOGGER.warning(
+                    "Error writing setting %s of %s: %s",
+                    command.cid, command.inverter_sn, e,
+                )
+                self.control.mark_failed(command, str(e))
+                continue
+            self.control.mark_sent(command, now)
+            if command.verify_key:
+                self.scheduler.expedite(command.inverter_sn, now + VERIFY_DELAY)
+
+    def write_setting(self, inverter_sn: str, cid: int, value: str) -> None:
+        """Write one inverter setting through the control endpoint."""
+        data = self._post(
+            CONTROL_ENDPOINT, {"inverterSn": inverter_sn, "cid": int(cid), "value": str(value)}
+        )
+        for result in data if isinstance(data, list) else [data]:
+            if isinstance(result, dict) and str(result.get("code", "0")) != "0":
+                raise SolisAPIError(result.get("msg") or f"Write rejected with code {result['code']}")
 
-        _LOGGER.debug("Retrieved %d inverter(s) with details", len(all_inverters))
-        return {"records": all_inverters}
+    def read_setting(self, inverter_sn: str, cid: int) -> str | None:
+        """Read one inverter setting through the atRead endpoint."""
+        data = self._post(READ_ENDPOINT, {"inverterSn": inverter_sn, "cid": int(cid)})
+        return data.get("msg") if isinstance(data, dict) else None
+
+    def _fetch_details(
+        self,
+        inverters: list[dict[str, Any]],
+        now: float,
+        unchanged: set[str],
+    ) -> list[dict[str, Any]]:
+        """Return the inverter records with their details, fanning out requests."""
+
+        def fetch(inv: dict[str, Any]) -> dict[str, Any]:
+            inverter_sn = inv.get("inverterSn")
+            if not (inv.get("id") and inverter_sn):
+                return inv
+            previous = self._previous_record(inverter_sn)
+            if not self.scheduler.due(inverter_sn, now):
+                if previous is None:
+                    return inv
+                unchanged.add(inverter_sn)
+                return previous
+
+            recovering = self.scheduler.failing(inverter_sn)
+            try:
+                record = self._fetch_detail(inv, unchanged)
+            except Exception as e:  # pylint: disable=broad-except
+                _LOGGER.warning("Error getting inverter detail for %s: %s", inverter_sn, e)
+                self.scheduler.record_failure(inverter_sn, now)
+                return previous if previous is not None else inv
+
+            self.scheduler.record_success(
+                inverter_sn, now, self.uploads.next_expected(inverter_sn)
+            )
+            if recovering:
+                # Its entities went unavailable, so they must be written again
+                unchanged.discard(inverter_sn)
+            if self.control.awaiting(inverter_sn):
+                self.scheduler.expedite(inverter_sn, now + VERIFY_DELAY)
+            return record
+
+        # Whole-poll profiles only see the polling thread, so fetch serially
+        if self.max_workers <= 1 or len(inverters) <= 1 or self.profiler.capturing:
+            return [fetch(inv) for inv in inverters]
+
+        if self._pool is None or self._pool_size != self.max_workers:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="solis_cloud"
+            )
+            self._pool_size = self.max_workers
+        return list(self._pool.map(fetch, inverters))
+
+    def _fetch_detail(
+        self, inv: dict[str, Any], unchanged: set[str]
+    ) -> dict[str, Any]:
+        """Fetch one inverter's detail and merge it with its list entry.
+
+        When the detail is not newer than, or matches, the previous poll the
+        previous merged record is returned instead, skipping the merge.
+        """
+        inverter_sn = inv["inverterSn"]
+        with self.profiler.span("fetch.inverter_detail"):
+            details = self._get_inverter_detail(inv["id"], inverter_sn)
+        previous = self._previous_record(inverter_sn)
+        if not details:
+            return previous if previous is not None else inv
+
+        timestamp = data_timestamp(details)
+        if timestamp is not None and not self.uploads.observe(inverter_sn, timestamp):
+            if previous is not None:
+                unchanged.add(inverter_sn)
+                return previous
+
+        # Read back settings written since the previous sample
+        self.control.verify(
+            inverter_sn, details, time.time() if timestamp is None else timestamp
+        )
+        return self._reuse_unchanged(
+            inverter_sn, details, lambda: {**inv, **details}, unchanged
+        )
+
+    def close(self) -> None:
+        """Release the worker threads and HTTP connections."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+        self._session.close()
 
     def _get_station_inverters(self, station_id: str) -> list[dict[str, Any]]:
         """Get inverters for a specific station."""
-        try:
-            data = self._post("/v1/api/inverterList", {"stationId": str(station_id)})
-            return data.get("page", {}).get("records", [])
-        except Exception as e:
-            _LOGGER.warning("Error getting inverters for station %s: %s", station_id, e)
-            return []
+        return list(self._iter_pages("/v1/api/inverterList", {"stationId": str(station_id)}))
 
     def _get_inverter_detail(self, inverter_id: str, inverter_sn: str) -> dict[str, Any]:
         """Get detailed inverter data."""
-        try:
-            return self._post("/v1/api/inverterDetail", {"id": str(inverter_id), "sn": str(inverter_sn)})
-        except Exception as e:
-            _LOGGER.warning("Error getting inverter detail for %s: %s", inverter_sn, e)
-            return {}
+        with self._request_lock:
+            self.detail_count += 1
+        return self._post("/v1/api/inverterDetail", {"id": str(inverter_id), "sn": str(inverter_sn)})
 
 
 class SolisAPIError(Exception):
@@ -7,12 +7,37 @@ from typing import Any
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.const import CONF_HOST, CONF_PORT, CONF_SCAN_INTERVAL
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
-
-from .const import DOMAIN
+import homeassistant.helpers.config_validation as cv
+
+from .const import (
+    CONF_EXCLUDED_INVERTERS,
+    CONF_HISTORY,
+    CONF_DAILY_REQUEST_BUDGET,
+    CONF_MAX_WORKERS,
+    CONF_REQUEST_TIMEOUT,
+    CONF_SENSOR_KEYS,
+    CONF_SERIAL,
+    CONF_SLAVE,
+    CONF_SNAPSHOT,
+    CONF_STATION_NAME,
+    CONF_TARIFF_TIMES,
+    CONF_TRANSITION_POLLING,
+    CONF_TRANSPORT,
+    DATA_TOPOLOGY,
+    DEFAULT_SCAN_INTERVAL,
+    DOMAIN,
+    TRANSPORT_CLOUD,
+    TRANSPORT_MODBUS,
+)
 from .api import SolisCloudAPI
+from .modbus import DEFAULT_PORT, DEFAULT_SLAVE, SolisModbusTransport
+from .transport import DEFAULT_MAX_WORKERS, DEFAULT_TIMEOUT
+from .sensor import SENSOR_KEY_NAMES
+from .windows import parse_times
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -24,6 +49,18 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
     }
 )
 
+STEP_MODBUS_DATA_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_HOST): str,
+        vol.Required(CONF_PORT, default=DEFAULT_PORT): cv.port,
+        vol.Required(CONF_SLAVE, default=DEFAULT_SLAVE): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=247)
+        ),
+        vol.Required(CONF_SERIAL): str,
+        vol.Required(CONF_STATION_NAME, default="Solis"): str,
+    }
+)
+
 
 async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
     """Validate the user input allows us to connect."""
@@ -34,29 +71,74 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
     )
 
     try:
-        result = await hass.async_add_executor_job(api.get_inverter_data)
-        inverter_count = len(result.get("records", []))
-        _LOGGER.info("Successfully validated connection, found %d inverter(s)", inverter_count)
+        result = await hass.async_add_executor_job(api.validate_credentials)
+        _LOGGER.info("Successfully validated connection, found %d station(s)", result["total"])
     except Exception as err:
         _LOGGER.error("Error connecting to Solis Cloud: %s", err)
         raise CannotConnect from err
+    finally:
+        await hass.async_add_executor_job(api.close)
+
+    # Hand the station list to the first refresh so it is not fetched twice
+    if result["stations"] is not None:
+        hass.data.setdefault(DATA_TOPOLOGY, {})[data["key_id"]] = result["stations"]
 
     # Use username if provided, otherwise use key_id
     title_name = data.get("username") or data["key_id"][:10]
     return {"title": f"Solis Cloud ({title_name})"}
 
 
+async def validate_modbus_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
+    """Validate that the inverter can be read over Modbus TCP."""
+    transport = SolisModbusTransport(
+        host=data[CONF_HOST],
+        port=data[CONF_PORT],
+        slave=data[CONF_SLAVE],
+        inverter_sn=data[CONF_SERIAL],
+        station_name=data[CONF_STATION_NAME],
+    )
+    transport.timeout = 10
+
+    try:
+        await hass.async_add_executor_job(transport.get_inverter_data)
+    except Exception as err:
+        _LOGGER.error("Error reading inverter over Modbus: %s", err)
+        raise CannotConnect from err
+    finally:
+        await hass.async_add_executor_job(transport.close)
+
+    return {"title": f"Solis Modbus ({data[CONF_SERIAL]})"}
+
+
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Solis Cloud."""
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> SolisCloudOptionsFlow:
+        """Get the options flow for this handler."""
+        return SolisCloudOptionsFlow()
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
         """Handle the initial step."""
+        return self.async_show_menu(
+            step_id="user", menu_options=[TRANSPORT_CLOUD, TRANSPORT_MODBUS]
+        )
+
+    async def async_step_cloud(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Handle setup through the Solis Cloud API."""
         errors: dict[str, str] = {}
         if user_input is not None:
+            await self.async_set_unique_id(user_input["key_id"])
+            self._abort_if_unique_id_configured()
             try:
                 info = await validate_input(self.hass, user_input)
             except CannotConnect:
@@ -68,8 +150,104 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 return self.async_create_entry(title=info["title"], data=user_input)
 
         return self.async_show_form(
-            step_id="user", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
+            step_id="cloud", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
+        )
+
+    async def async_step_modbus(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Handle setup of a local Modbus TCP connection."""
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            await self.async_set_unique_id(user_input[CONF_SERIAL])
+            self._abort_if_unique_id_configured()
+            try:
+                info = await validate_modbus_input(self.hass, user_input)
+            except CannotConnect:
+                errors["base"] = "cannot_connect"
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Unexpected exception")
+                errors["base"] = "unknown"
+            else:
+                return self.async_create_entry(
+                    title=info["title"],
+                    data={CONF_TRANSPORT: TRANSPORT_MODBUS, **user_input},
+                )
+
+        return self.async_show_form(
+            step_id="modbus", data_schema=STEP_MODBUS_DATA_SCHEMA, errors=errors
+        )
+
+
+class SolisCloudOptionsFlow(config_entries.OptionsFlow):
+    """Handle runtime tuning options for Solis Cloud."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options."""
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            try:
+                parse_times(user_input.get(CONF_TARIFF_TIMES, ""))
+            except ValueError:
+                errors[CONF_TARIFF_TIMES] = "invalid_times"
+            else:
+                return self.async_create_entry(title="", data=user_input)
+
+        options = {**self.config_entry.options, **(user_input or {})}
+        serials = []
+        default_interval = DEFAULT_SCAN_INTERVAL
+        min_interval = 30
+        coordinator = self.hass.data.get(DOMAIN, {}).get(self.config_entry.entry_id)
+        if coordinator is not None:
+            serials = list(coordinator.transport.inverter_serials)
+            default_interval = coordinator.transport.default_scan_interval
+            min_interval = coordinator.transport.min_scan_interval
+        excluded = options.get(CONF_EXCLUDED_INVERTERS, [])
+        serials.extend(serial for serial in excluded if serial not in serials)
+
+        schema = vol.Schema(
+            {
+                vol.Optional(
+                    CONF_SCAN_INTERVAL,
+                    default=options.get(CONF_SCAN_INTERVAL, default_interval),
+                ): vol.All(vol.Coerce(int), vol.Range(min=min_interval, max=3600)),
+                vol.Optional(
+                    CONF_MAX_WORKERS,
+                    default=options.get(CONF_MAX_WORKERS, DEFAULT_MAX_WORKERS),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=16)),
+                vol.Optional(
+                    CONF_REQUEST_TIMEOUT,
+                    default=options.get(CONF_REQUEST_TIMEOUT, DEFAULT_TIMEOUT),
+                ): vol.All(vol.Coerce(int), vol.Range(min=5, max=120)),
+                vol.Optional(
+                    CONF_SENSOR_KEYS,
+                    default=options.get(CONF_SENSOR_KEYS) or list(SENSOR_KEY_NAMES),
+                ): cv.multi_select(SENSOR_KEY_NAMES),
+                vol.Optional(
+                    CONF_EXCLUDED_INVERTERS, default=excluded
+                ): cv.multi_select({serial: serial for serial in serials}),
+                vol.Optional(
+                    CONF_HISTORY, default=options.get(CONF_HISTORY, False)
+                ): bool,
+                vol.Optional(
+                    CONF_SNAPSHOT, default=options.get(CONF_SNAPSHOT, False)
+                ): bool,
+                vol.Optional(
+                    CONF_TRANSITION_POLLING,
+                    default=options.get(CONF_TRANSITION_POLLING, False),
+                ): bool,
+                vol.Optional(
+                    CONF_TARIFF_TIMES, default=options.get(CONF_TARIFF_TIMES, "")
+                ): str,
+                vol.Optional(
+                    CONF_DAILY_REQUEST_BUDGET,
+                    default=options.get(CONF_DAILY_REQUEST_BUDGET, 0),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=1000000)),
+            }
         )
+        return self.async_show_form(step_id="init", data_schema=schema, errors=errors)
 
 
 class CannotConnect(HomeAssistantError):
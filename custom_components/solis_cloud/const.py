@@ -1,3 +1,39 @@
 """Constants for the Solis Cloud integration."""
 
 DOMAIN = "solis_cloud"
+
+# Station lists found during the config flow, keyed by API key ID
+DATA_TOPOLOGY = f"{DOMAIN}_topology"
+
+# Config entry data
+CONF_TRANSPORT = "transport"
+CONF_SLAVE = "slave"
+CONF_SERIAL = "serial"
+CONF_STATION_NAME = "station_name"
+
+TRANSPORT_CLOUD = "cloud"
+TRANSPORT_MODBUS = "modbus"
+
+# Options
+CONF_HISTORY = "history"
+CONF_MAX_WORKERS = "max_workers"
+CONF_REQUEST_TIMEOUT = "request_timeout"
+CONF_SENSOR_KEYS = "sensor_keys"
+CONF_EXCLUDED_INVERTERS = "excluded_inverters"
+CONF_TRANSITION_POLLING = "transition_polling"
+CONF_TARIFF_TIMES = "tariff_times"
+CONF_DAILY_REQUEST_BUDGET = "daily_request_budget"
+CONF_SNAPSHOT = "snapshot"
+
+DEFAULT_SCAN_INTERVAL = 300
+
+# Requests per second the cloud API accepts for one key
+API_REQUESTS_PER_SECOND = 2
+
+# Services
+SERVICE_QUERY_HISTORY = "query_history"
+SERVICE_SET_PROFILER = "set_profiler"
+SERVICE_EXPORT_HISTORY = "export_history"
+SERVICE_WRITE_SETTING = "write_setting"
+SERVICE_READ_SETTING = "read_setting"
+SERVICE_RECORD_RESPONSES = "record_responses"
@@ -0,0 +1,154 @@
+"""Queued writes of inverter settings through the cloud control API.
+
+SolisCloud addresses inverter settings by command id (cid): control writes a
+value and atRead reads one back. Writes submitted between polls are merged
+per inverter and setting, sent from the polling thread within each tick's
+request budget, and verified against the inverter's next fresh detail when
+the setting is mirrored there, instead of with an extra read per write.
+"""
+from __future__ import annotations
+
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any
+
+CONTROL_ENDPOINT = "/v2/api/control"
+READ_ENDPOINT = "/v2/api/atRead"
+
+# A written inverter is fetched again this many seconds later to read back
+VERIFY_DELAY = 60
+
+# Fresh details compared before a write is reported as not applied
+VERIFY_ATTEMPTS = 3
+
+STATE_PENDING = "pending"
+STATE_SENT = "sent"
+STATE_VERIFIED = "verified"
+STATE_FAILED = "failed"
+
+
+@dataclass
+class ControlCommand:
+    """A setting write and its progress."""
+
+    inverter_sn: str
+    cid: int
+    value: str
+    verify_key: str | None = None
+    state: str = STATE_PENDING
+    submitted: float = 0.0
+    sent: float | None = None
+    attempts: int = 0
+    error: str | None = None
+
+
+def _same_value(reported: Any, value: str) -> bool:
+    """Compare a detail value with a written one, numerically when possible."""
+    if reported is None:
+        return False
+    try:
+        return float(reported) == float(value)
+    except (ValueError, TypeError):
+        return str(reported).strip() == value.strip()
+
+
+class ControlQueue:
+    """Pending setting writes, merged per inverter and command id."""
+
+    def __init__(self) -> None:
+        """Initialize an empty queue."""
+        self._lock = threading.Lock()
+        # Waiting to be sent, oldest first
+        self._pending: dict[tuple[str, int], ControlCommand] = {}
+        # Sent and waiting for a detail to read back
+        self._awaiting: dict[tuple[str, int], ControlCommand] = {}
+        # Latest command per setting, for status
+        self._latest: dict[tuple[str, int], ControlCommand] = {}
+
+    def __len__(self) -> int:
+        """Return the number of writes waiting to be sent."""
+        return len(self._pending)
+
+    def submit(
+        self,
+        inverter_sn: str,
+        cid: int,
+        value: str,
+        verify_key: str | None,
+        now: float,
+    ) -> bool:
+        """Queue a write; return False when it would not change anything.
+
+        A write to a setting that is still queued replaces the queued value
+        and keeps its place. A write of the value that was sent and is still
+        awaiting read back is dropped; once it has been read back the setting
+        may have been changed elsewhere, so the same value is written again.
+        """
+        key = (inverter_sn, cid)
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None:
+                pending.value = value
+                pending.verify_key = verify_key or pending.verify_key
+                return True
+            in_flight = self._awaiting.get(key)
+            if in_flight is not None and in_flight.value == value:
+                return False
+            command = ControlCommand(inverter_sn, cid, value, verify_key, submitted=now)
+            self._pending[key] = command
+            self._latest[key] = command
+            self._awaiting.pop(key, None)
+            return True
+
+    def take(self, limit: int) -> list[ControlCommand]:
+        """Remove and return up to limit of the oldest queued writes."""
+        with self._lock:
+            keys = list(self._pending)[:limit]
+            return [self._pending.pop(key) for key in keys]
+
+    def mark_sent(self, command: ControlCommand, now: float) -> None:
+        """Record that the API accepted a write."""
+        with self._lock:
+            command.state = STATE_SENT
+            command.sent = now
+            if command.verify_key:
+                self._awaiting[(command.inverter_sn, command.cid)] = command
+
+    def mark_failed(self, command: ControlCommand, error: str) -> None:
+        """Record that a write was rejected."""
+        with self._lock:
+            command.state = STATE_FAILED
+            command.error = error
+
+    def verify(self, inverter_sn: str, details: dict[str, Any], sample_time: float) -> None:
+        """Compare a fresh detail with the writes awaiting read back.
+
+        Only details sampled after the write count as a read back.
+        """
+        if not self._awaiting:
+            return
+        with self._lock:
+            for key, command in list(self._awaiting.items()):
+                if command.inverter_sn != inverter_sn or sample_time <= command.sent:
+                    continue
+                reported = details.get(command.verify_key)
+                if _same_value(reported, command.value):
+                    command.state = STATE_VERIFIED
+                    del self._awaiting[key]
+                    continue
+                command.attempts += 1
+                if command.attempts >= VERIFY_ATTEMPTS:
+                    command.state = STATE_FAILED
+                    command.error = f"Inverter reports {command.verify_key}={reported}"
+                    del self._awaiting[key]
+
+    def awaiting(self, inverter_sn: str) -> bool:
+        """Return True while a write to the inverter awaits read back."""
+        with self._lock:
+            return any(key[0] == inverter_sn for key in self._awaiting)
+
+    def status(self, inverter_sn: str, cid: int) -> dict[str, Any] | None:
+        """Return the progress of the latest write to a setting."""
+        with self._lock:
+            command = self._latest.get((inverter_sn, cid))
+            return asdict(command) if command is not None else None
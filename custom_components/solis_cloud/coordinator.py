@@ -0,0 +1,294 @@
+"""Data update coordinator for the Solis Cloud integration."""
+from __future__ import annotations
+
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_SCAN_INTERVAL, SUN_EVENT_SUNRISE, SUN_EVENT_SUNSET
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import STORAGE_DIR, Store
+from homeassistant.helpers.sun import get_astral_event_date
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from .aggregate import DailyTotals, compute_aggregates
+from .transport import DEFAULT_MAX_WORKERS, DEFAULT_TIMEOUT, InverterTransport
+from .const import (
+    CONF_EXCLUDED_INVERTERS,
+    CONF_HISTORY,
+    CONF_MAX_WORKERS,
+    CONF_REQUEST_TIMEOUT,
+    CONF_DAILY_REQUEST_BUDGET,
+    CONF_SENSOR_KEYS,
+    CONF_SNAPSHOT,
+    CONF_TARIFF_TIMES,
+    CONF_TRANSITION_POLLING,
+    DOMAIN,
+)
+from .energy import EnergyIntegrator
+from .history import HistoryStore
+from .integrity import CounterValidator
+from .sensor import COUNTER_KEYS, SENSOR_KEY_NAMES, SENSOR_KEYS
+from .snapshot import SnapshotExport
+from .windows import parse_times, plan_day
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+ENERGY_SAVE_DELAY = 60
+
+
+class SolisCloudCoordinator(DataUpdateCoordinator):
+    """Fetch inverter data and run the per-poll processing pipeline."""
+
+    def __init__(
+        self, hass: HomeAssistant, entry: ConfigEntry, transport: InverterTransport
+    ) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN,
+            update_interval=timedelta(seconds=transport.tick_interval),
+        )
+        self.config_entry = entry
+        self.transport = transport
+        transport.fingerprint_keys = SENSOR_KEYS
+        self.sensor_keys: set[str] = set(SENSOR_KEY_NAMES)
+        # Bumped whenever options change which entities should exist
+        self.config_generation = 0
+        self.validator = CounterValidator(COUNTER_KEYS)
+        self.integrator = EnergyIntegrator()
+        self.daily_totals = DailyTotals()
+        self._energy_store: Store = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.energy"
+        )
+        self._history_path = hass.config.path(
+            STORAGE_DIR, f"{DOMAIN}_history", entry.entry_id
+        )
+        self.history: HistoryStore | None = None
+        # Shared memory when available, so readers never touch the disk
+        snapshot_dir = "/dev/shm" if os.path.isdir("/dev/shm") else hass.config.path(STORAGE_DIR)
+        self.snapshot_path = os.path.join(snapshot_dir, f"{DOMAIN}_{entry.entry_id}.snapshot")
+        self.snapshot: SnapshotExport | None = None
+        self.transition_polling = False
+        self.tariff_times: list = []
+        self.daily_request_budget = 0
+        # When the current poll plan ends and how many inverters were listed
+        self._plan_end = 0.0
+        self._plan_inverters = 0
+
+    async def async_apply_options(self, options: dict[str, Any]) -> None:
+        """Apply the entry options to the running coordinator and client."""
+        self.transport.set_scan_interval(
+            options.get(CONF_SCAN_INTERVAL, self.transport.default_scan_interval)
+        )
+        self.update_interval = timedelta(seconds=self.transport.tick_interval)
+        self.transport.timeout = options.get(CONF_REQUEST_TIMEOUT, DEFAULT_TIMEOUT)
+        self.transport.max_workers = options.get(CONF_MAX_WORKERS, DEFAULT_MAX_WORKERS)
+        self.transport.excluded_serials = set(options.get(CONF_EXCLUDED_INVERTERS, []))
+        # An empty selection means every sensor
+        self.sensor_keys = set(options.get(CONF_SENSOR_KEYS) or SENSOR_KEY_NAMES)
+        self.config_generation += 1
+
+        self.transition_polling = options.get(CONF_TRANSITION_POLLING, False)
+        self.tariff_times = parse_times(options.get(CONF_TARIFF_TIMES, ""))
+        self.daily_request_budget = options.get(CONF_DAILY_REQUEST_BUDGET, 0)
+        self._plan_end = 0.0
+        self.transport.set_poll_plan(None)
+
+        if options.get(CONF_HISTORY, False):
+            if self.history is None:
+                self.history = HistoryStore(self._history_path, SENSOR_KEYS)
+        elif self.history is not None:
+            history, self.history = self.history, None
+            await self.hass.async_add_executor_job(history.close)
+
+        if options.get(CONF_SNAPSHOT, False):
+            if self.snapshot is None:
+                self.snapshot = SnapshotExport(self.snapshot_path, SENSOR_KEYS)
+                _LOGGER.info("Exporting inverter snapshots to %s", self.snapshot_path)
+        elif self.snapshot is not None:
+            snapshot, self.snapshot = self.snapshot, None
+            await self.hass.async_add_executor_job(snapshot.close)
+
+    async def async_load_state(self) -> None:
+        """Restore state persisted across restarts."""
+        stored = await self._energy_store.async_load()
+        self.integrator.load(stored)
+        self.validator.load((stored or {}).get("counters"))
+        self.daily_totals.load((stored or {}).get("daily_totals"))
+
+    def _stored_state(self) -> dict[str, Any]:
+        """Return the integrated energy, accepted counters and daily totals to persist."""
+        return {
+            **self.integrator.as_dict(),
+            "counters": self.validator.as_dict(),
+            "daily_totals": self.daily_totals.as_dict(),
+        }
+
+    def _fetch(self) -> dict[str, Any]:
+        """Fetch, validate and record inverter data; runs in the executor."""
+        profiler = self.transport.profiler
+        recorder = getattr(self.transport, "recorder", None)
+        if recorder is not None:
+            recorder.start_poll(time.time())
+        requests_before = getattr(self.transport, "request_count", None)
+        with profiler.capture() as capture:
+            try:
+                with profiler.span("fetch"):
+                    data = self.transport.get_inverter_data()
+            finally:
+                # Ticks without a due inverter are not worth a snapshot or capture
+                made_requests = (
+                    requests_before is None
+                    or self.transport.request_count != requests_before
+                )
+                if capture is not None:
+                    capture.keep = made_requests
+                if recorder is not None and recorder.end_poll(made_requests):
+                    if self.transport.recorder is recorder:
+                        self.transport.recorder = None
+                    recorder.close()
+                    _LOGGER.info("Wrote response capture %s", recorder.path)
+            unchanged = data.setdefault("unchanged", set())
+            data.setdefault("unavailable", set())
+            # Records identical to the previous poll were already processed
+            changed = [
+                record for record in data["records"]
+                if record.get("inverterSn") not in unchanged
+            ]
+            with profiler.span("pipeline.validate"):
+                corrected = self.validator.process(changed, dt_util.now())
+            if corrected:
+                _LOGGER.debug("Repaired %d energy counter value(s)", corrected)
+            if self.history is not None and changed:
+                try:
+                    with profiler.span("pipeline.history"):
+                        self.history.append(time.time(), changed)
+                except OSError as err:
+                    _LOGGER.warning("Error writing local history: %s", err)
+            snapshot = self.snapshot
+            if snapshot is not None:
+                try:
+                    with profiler.span("pipeline.snapshot"):
+                        snapshot.write(time.time(), data["records"], unchanged)
+                except (OSError, ValueError) as err:
+                    _LOGGER.warning("Error writing snapshot: %s", err)
+        return data
+
+    def _plan_polling(self) -> None:
+        """Plan the rest of today's polling around its transitions."""
+        now = dt_util.now()
+        day = now.date()
+        transitions = []
+        for event in (SUN_EVENT_SUNRISE, SUN_EVENT_SUNSET):
+            moment = get_astral_event_date(self.hass, event, day)
+            if moment is not None:
+                transitions.append(moment.timestamp())
+        transitions.extend(
+            datetime.combine(day, tariff_time, now.tzinfo).timestamp()
+            for tariff_time in self.tariff_times
+        )
+
+        transport = self.transport
+        inverters = len(
+            [sn for sn in transport.inverter_serials if sn not in transport.excluded_serials]
+        )
+        end = (dt_util.start_of_local_day(now) + timedelta(days=1)).timestamp()
+        plan = plan_day(
+            transitions,
+            now.timestamp(),
+            end,
+            transport.scan_interval,
+            transport.min_scan_interval,
+            inverters,
+            self.daily_request_budget or None,
+            transport.overhead_requests(end - now.timestamp()),
+        )
+        transport.set_poll_plan(plan)
+        self._plan_end = end
+        self._plan_inverters = len(transport.inverter_serials)
+        _LOGGER.debug(
+            "Polling every %ds in %d transition window(s), every %ds elsewhere",
+            plan.fast_interval, len(plan.windows), plan.slow_interval,
+        )
+
+    async def _async_update_data(self) -> dict[str, Any]:
+        """Fetch data from API."""
+        if self.transition_polling and (
+            time.time() >= self._plan_end
+            or self._plan_inverters != len(self.transport.inverter_serials)
+        ):
+            self._plan_polling()
+
+        try:
+            data = await self.hass.async_add_executor_job(self._fetch)
+        except Exception as err:
+            raise UpdateFailed(f"Error communicating with API: {err}") from err
+
+        profiler = self.transport.profiler
+        with profiler.span("pipeline.integrate"):
+            self.integrator.process(
+                data["records"], time.time(), self.transport.max_poll_interval()
+            )
+            data["energy"] = self.integrator.totals()
+        self._energy_store.async_delay_save(self._stored_state, ENERGY_SAVE_DELAY)
+
+        previous = self.data
+        unchanged = data["unchanged"]
+        if not self.last_update_success:
+            # Entities went unavailable with the failed refresh; update them all
+            unchanged.clear()
+        with profiler.span("pipeline.daily_totals"):
+            daily_moved = self.daily_totals.process(
+                [
+                    record for record in data["records"]
+                    if record.get("inverterSn") not in unchanged
+                ],
+                dt_util.now().date(),
+            )
+        if (
+            not daily_moved
+            and previous is not None
+            and "aggregates" in previous
+            and len(unchanged) == len(data["records"])
+            and len(previous["records"]) == len(data["records"])
+        ):
+            # Nothing moved, keep the same object so aggregate sensors skip too
+            data["aggregates"] = previous["aggregates"]
+        else:
+            with profiler.span("pipeline.aggregate"):
+                data["aggregates"] = compute_aggregates(data["records"], self.daily_totals)
+
+        # Sensors look up their inverter's record by serial number
+        data["index"] = {record.get("inverterSn"): record for record in data["records"]}
+
+        return data
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all entities, timing the fan-out when profiling."""
+        profiler = self.transport.profiler
+        with profiler.span("entities.update"):
+            super().async_update_listeners()
+        if profiler.enabled:
+            profiler.flush()
+
+    async def async_shutdown(self) -> None:
+        """Release resources held by the coordinator."""
+        await super().async_shutdown()
+        await self._energy_store.async_save(self._stored_state())
+        await self.hass.async_add_executor_job(self.transport.close)
+        recorder = getattr(self.transport, "recorder", None)
+        if recorder is not None:
+            self.transport.recorder = None
+            await self.hass.async_add_executor_job(recorder.close)
+        if self.history is not None:
+            await self.hass.async_add_executor_job(self.history.close)
+        if self.snapshot is not None:
+            await self.hass.async_add_executor_job(self.snapshot.close)
@@ -0,0 +1,177 @@
+"""Bulk export of per-inverter energy reports to compressed CSV.
+
+Report requests for every inverter and period run on a bounded thread pool and
+each finished report is written straight to a gzip CSV stream, so memory use
+depends on the number of requests in flight rather than the size of the range.
+The client paces the requests to the API's rate limit, and a report that
+still fails after its retries is returned to the caller rather than skipped.
+"""
+from __future__ import annotations
+
+import csv
+import gzip
+import logging
+import time
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import date, datetime, timezone
+from typing import Any
+
+from .api import SolisCloudAPI
+
+_LOGGER = logging.getLogger(__name__)
+
+# Report granularity -> the API report that lists it
+GRANULARITY_REPORTS = {
+    "day": "month",
+    "month": "year",
+    "year": "all",
+}
+
+EXPORT_FIELDS = (
+    "energy",
+    "gridPurchasedEnergy",
+    "gridSellEnergy",
+    "batteryChargeEnergy",
+    "batteryDischargeEnergy",
+    "homeLoadEnergy",
+)
+
+CSV_COLUMNS = ("inverter_sn", "station_name", "period", "unit") + EXPORT_FIELDS
+
+_PERIOD_FORMATS = {"day": "%Y-%m-%d", "month": "%Y-%m", "year": "%Y"}
+
+# Attempts per report request, and the wait before retrying a failed one
+EXPORT_ATTEMPTS = 3
+RETRY_DELAY = 5.0
+
+
+def _report_periods(granularity: str, start: date, end: date) -> list[str]:
+    """Return the report periods needed to cover start to end."""
+    if granularity == "day":
+        periods = []
+        year, month = start.year, start.month
+        while (year, month) <= (end.year, end.month):
+            periods.append(f"{year:04d}-{month:02d}")
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return periods
+    if granularity == "month":
+        return [str(year) for year in range(start.year, end.year + 1)]
+    return [""]
+
+
+def _row_period(row: dict[str, Any], granularity: str) -> str | None:
+    """Return the period label of a report row."""
+    if date_str := row.get("dateStr"):
+        return str(date_str)
+    timestamp = row.get("date")
+    if timestamp is None:
+        return None
+    try:
+        moment = datetime.fromtimestamp(int(timestamp) / 1000, timezone.utc)
+    except (ValueError, TypeError, OverflowError):
+        return None
+    return moment.strftime(_PERIOD_FORMATS[granularity])
+
+
+def _csv_rows(
+    inverter: dict[str, Any],
+    rows: list[dict[str, Any]],
+    granularity: str,
+    first: str,
+    last: str,
+) -> Iterator[list[Any]]:
+    """Yield the CSV rows of one report that fall inside first..last."""
+    for row in rows:
+        period = _row_period(row, granularity)
+        if period is None or not first <= period[: len(first)] <= last:
+            continue
+        yield [
+            inverter.get("inverterSn"),
+            inverter.get("stationName", ""),
+            period,
+            row.get("energyStr", ""),
+            *(row.get(field, "") for field in EXPORT_FIELDS),
+        ]
+
+
+def export_history(
+    api: SolisCloudAPI,
+    path: str,
+    granularity: str,
+    start: date,
+    end: date,
+    max_workers: int,
+) -> tuple[int, list[dict[str, str]]]:
+    """Write every inverter's energy per period to a gzip CSV file.
+
+    Returns the number of data rows written and the serial and period of
+    every report that could not be fetched.
+    """
+    report = GRANULARITY_REPORTS[granularity]
+    periods = _report_periods(granularity, start, end)
+    period_format = _PERIOD_FORMATS[granularity]
+    first = start.strftime(period_format)
+    last = end.strftime(period_format)
+    written = 0
+    failed: list[dict[str, str]] = []
+
+    def jobs() -> Iterator[tuple[dict[str, Any], str]]:
+        for inverter in api.get_all_inverters():
+            if inverter.get("id") and inverter.get("inverterSn"):
+                for period in periods:
+                    yield inverter, period
+
+    def fetch(
+        inverter: dict[str, Any], period: str
+    ) -> tuple[dict[str, Any], str, list | None]:
+        for attempt in range(1, EXPORT_ATTEMPTS + 1):
+            try:
+                return inverter, period, api.get_inverter_report(inverter, report, period)
+            except Exception as err:  # pylint: disable=broad-except
+                _LOGGER.warning(
+                    "Error exporting %s report %s for %s (attempt %d of %d): %s",
+                    report, period or "all", inverter.get("inverterSn"),
+                    attempt, EXPORT_ATTEMPTS, err,
+                )
+            if attempt < EXPORT_ATTEMPTS:
+                time.sleep(RETRY_DELAY)
+        return inverter, period, None
+
+    with gzip.open(path, "wt", encoding="utf-8", newline="") as file, ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="solis_cloud_export"
+    ) as pool:
+        writer = csv.writer(file)
+        writer.writerow(CSV_COLUMNS)
+
+        pending: set[Future] = set()
+
+        def drain(block_until: int) -> None:
+            nonlocal pending, written
+            while len(pending) > block_until:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    inverter, period, rows = future.result()
+                    if rows is None:
+                        failed.append(
+                            {"serial": inverter.get("inverterSn"), "period": period or "all"}
+                        )
+                        continue
+                    for csv_row in _csv_rows(inverter, rows, granularity, first, last):
+                        writer.writerow(csv_row)
+                        written += 1
+
+        for inverter, period in jobs():
+            pending.add(pool.submit(fetch, inverter, period))
+            # Keep at most two requests per worker in flight
+            drain(max_workers * 2)
+        drain(0)
+
+    if failed:
+        _LOGGER.warning(
+            "Exported %d %s row(s) to %s, %d report(s) failed",
+            written, granularity, path, len(failed),
+        )
+    else:
+        _LOGGER.info("Exported %d %s row(s) to %s", written, granularity, path)
+    return written, failed
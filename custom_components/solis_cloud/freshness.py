@@ -0,0 +1,79 @@
+"""Tracking of the data logger upload time reported with each sample.
+
+inverterDetail carries "dataTimestamp", the time (in ms) the logger uploaded
+the sample. Polling faster than the logger uploads returns the same sample
+again, so the tracker learns each inverter's upload cadence and tells the
+client when a new sample can be expected.
+"""
+from __future__ import annotations
+
+import statistics
+from collections import deque
+from typing import Any
+
+TIMESTAMP_KEY = "dataTimestamp"
+
+# Bounds of the learned upload cadence, in seconds
+MIN_CADENCE = 60
+MAX_CADENCE = 3600
+CADENCE_SAMPLES = 8
+
+# Extra wait after the expected upload before fetching again
+UPLOAD_GRACE = 30
+
+
+def data_timestamp(record: dict[str, Any]) -> float | None:
+    """Return the upload time of a record in seconds, if reported."""
+    value = record.get(TIMESTAMP_KEY)
+    if value is None or value == "":
+        return None
+    try:
+        return float(value) / 1000
+    except (ValueError, TypeError):
+        return None
+
+
+def sample_time(record: dict[str, Any], default: float) -> float:
+    """Return when a record was measured, falling back to the poll time."""
+    timestamp = data_timestamp(record)
+    return default if timestamp is None else timestamp
+
+
+class UploadTracker:
+    """Learn per-inverter upload cadence from successive data timestamps."""
+
+    def __init__(self) -> None:
+        """Initialize an empty tracker."""
+        self._last: dict[str, float] = {}
+        self._intervals: dict[str, deque] = {}
+
+    def last_upload(self, inverter_sn: str) -> float | None:
+        """Return the newest upload time seen for an inverter."""
+        return self._last.get(inverter_sn)
+
+    def observe(self, inverter_sn: str, timestamp: float) -> bool:
+        """Record an upload time; return True if it is newer than the last."""
+        last = self._last.get(inverter_sn)
+        if last is not None and timestamp <= last:
+            return False
+        if last is not None:
+            self._intervals.setdefault(
+                inverter_sn, deque(maxlen=CADENCE_SAMPLES)
+            ).append(timestamp - last)
+        self._last[inverter_sn] = timestamp
+        return True
+
+    def cadence(self, inverter_sn: str) -> float | None:
+        """Return the typical seconds between uploads, once learned."""
+        intervals = self._intervals.get(inverter_sn)
+        if not intervals:
+            return None
+        return min(max(statistics.median(intervals), MIN_CADENCE), MAX_CADENCE)
+
+    def next_expected(self, inverter_sn: str) -> float | None:
+        """Return when the next upload should be available."""
+        last = self._last.get(inverter_sn)
+        cadence = self.cadence(inverter_sn)
+        if last is None or cadence is None:
+            return None
+        return last + cadence + UPLOAD_GRACE
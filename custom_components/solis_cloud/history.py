@@ -0,0 +1,268 @@
+"""Compact local history of raw inverter samples.
+
+Each inverter gets one memory-mapped file holding a fixed-size ring buffer of
+records. A record is a float64 unix timestamp followed by one float32 column
+per key in SENSOR_DEFINITIONS, with NaN for values the API did not report.
+"""
+from __future__ import annotations
+
+import bisect
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+import zlib
+from typing import Any
+
+from .freshness import sample_time
+from .values import as_float
+
+_LOGGER = logging.getLogger(__name__)
+
+MAGIC = b"SLSH"
+VERSION = 1
+
+# magic, version, column count, capacity, next write slot, record count, key checksum
+_HEADER = struct.Struct("<4sHHIIII")
+HEADER_SIZE = 32
+
+# Two weeks at one-minute polling, or ten weeks at the default five minutes
+DEFAULT_CAPACITY = 20160
+
+# Serial numbers usable as file names
+_SERIAL_PATTERN = re.compile(r"[A-Za-z0-9_-][A-Za-z0-9._-]*")
+
+
+class InverterHistory:
+    """Ring buffer of samples for a single inverter, backed by an mmap file."""
+
+    def __init__(
+        self, path: str, keys: tuple[str, ...], capacity: int, writable: bool = True
+    ) -> None:
+        """Open or create the ring buffer file at path.
+
+        A read-only buffer never creates or resets the file; it raises
+        FileNotFoundError when there is none and ValueError when its layout
+        differs.
+        """
+        self.path = path
+        self.keys = keys
+        self.writable = writable
+        self._record = struct.Struct(f"<d{len(keys)}f")
+        self._checksum = zlib.crc32(",".join(keys).encode("utf-8"))
+        size = HEADER_SIZE + capacity * self._record.size
+
+        if writable:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        else:
+            fd = os.open(path, os.O_RDONLY)
+        try:
+            fresh = os.fstat(fd).st_size != size
+            if fresh and not writable:
+                raise ValueError(f"{path} does not match the history layout")
+            if fresh:
+                os.ftruncate(fd, size)
+            self._mm = mmap.mmap(
+                fd, size, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+            )
+        finally:
+            os.close(fd)
+
+        if not fresh:
+            magic, version, columns, stored_capacity, head, count, checksum = (
+                _HEADER.unpack_from(self._mm, 0)
+            )
+            fresh = (
+                magic != MAGIC
+                or version != VERSION
+                or columns != len(keys)
+                or stored_capacity != capacity
+                or checksum != self._checksum
+                or head >= capacity
+                or count > capacity
+            )
+            if fresh and not writable:
+                self._mm.close()
+                raise ValueError(f"{path} does not match the history layout")
+            if fresh:
+                _LOGGER.info("Resetting history file %s after layout change", path)
+
+        self.capacity = capacity
+        if fresh:
+            self._head = 0
+            self._count = 0
+            self._write_header()
+        else:
+            self._head = head
+            self._count = count
+
+    def _write_header(self) -> None:
+        """Persist the ring buffer position."""
+        _HEADER.pack_into(
+            self._mm, 0, MAGIC, VERSION, len(self.keys), self.capacity,
+            self._head, self._count, self._checksum,
+        )
+
+    def _offset(self, slot: int) -> int:
+        """Return the byte offset of a ring slot."""
+        return HEADER_SIZE + slot * self._record.size
+
+    def _oldest_slot(self) -> int:
+        """Return the slot of the oldest record."""
+        return (self._head - self._count) % self.capacity
+
+    def _timestamp(self, index: int) -> float:
+        """Return the timestamp of the index-th oldest record."""
+        slot = (self._oldest_slot() + index) % self.capacity
+        return struct.unpack_from("<d", self._mm, self._offset(slot))[0]
+
+    def latest_timestamp(self) -> float | None:
+        """Return the timestamp of the newest record, if any."""
+        if not self._count:
+            return None
+        return self._timestamp(self._count - 1)
+
+    def append(self, timestamp: float, record: dict[str, Any]) -> None:
+        """Append one sample, overwriting the oldest when full."""
+        latest = self.latest_timestamp()
+        if latest is not None and timestamp <= latest:
+            # Keep the ring ordered so range queries can bisect
+            return
+        self._record.pack_into(
+            self._mm,
+            self._offset(self._head),
+            timestamp,
+            *(as_float(record.get(key), math.nan) for key in self.keys),
+        )
+        self._head = (self._head + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+        self._write_header()
+
+    def query(
+        self, start: float, end: float, keys: list[str] | None = None
+    ) -> dict[str, list]:
+        """Return the samples with start <= timestamp <= end as columns."""
+        columns = [self.keys.index(key) for key in keys] if keys else range(len(self.keys))
+        timestamps = _TimestampView(self)
+        first = bisect.bisect_left(timestamps, start)
+        last = bisect.bisect_right(timestamps, end)
+
+        result: dict[str, list] = {"timestamp": []}
+        for column in columns:
+            result[self.keys[column]] = []
+
+        oldest = self._oldest_slot()
+        for index in range(first, last):
+            row = self._record.unpack_from(
+                self._mm, self._offset((oldest + index) % self.capacity)
+            )
+            result["timestamp"].append(row[0])
+            for column in columns:
+                value = row[column + 1]
+                result[self.keys[column]].append(None if math.isnan(value) else value)
+        return result
+
+    def close(self) -> None:
+        """Flush and unmap the file."""
+        if self.writable:
+            self._mm.flush()
+        self._mm.close()
+
+
+class _TimestampView:
+    """Sequence view over record timestamps in age order, for bisect."""
+
+    def __init__(self, history: InverterHistory) -> None:
+        self._history = history
+
+    def __len__(self) -> int:
+        return self._history._count
+
+    def __getitem__(self, index: int) -> float:
+        return self._history._timestamp(index)
+
+
+class HistoryStore:
+    """Per-inverter ring buffers kept under one directory."""
+
+    def __init__(
+        self, directory: str, keys: tuple[str, ...], capacity: int = DEFAULT_CAPACITY
+    ) -> None:
+        """Initialize the store; files are opened lazily."""
+        self.directory = directory
+        self.keys = keys
+        self.capacity = capacity
+        self._buffers: dict[str, InverterHistory] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, inverter_sn: str) -> str:
+        """Return the file of an inverter; raise ValueError for unsafe serials."""
+        if not _SERIAL_PATTERN.fullmatch(inverter_sn):
+            raise ValueError(f"Invalid inverter serial number: {inverter_sn!r}")
+        return os.path.join(self.directory, f"{inverter_sn}.bin")
+
+    def _get(self, inverter_sn: str) -> InverterHistory:
+        """Return the ring buffer for an inverter, opening it if needed."""
+        history = self._buffers.get(inverter_sn)
+        if history is None:
+            path = self._path(inverter_sn)
+            os.makedirs(self.directory, exist_ok=True)
+            history = self._buffers[inverter_sn] = InverterHistory(
+                path, self.keys, self.capacity
+            )
+        return history
+
+    def append(self, poll_time: float, records: list[dict[str, Any]]) -> None:
+        """Append the current sample of every inverter.
+
+        Samples are stamped with their upload time when the API reports one.
+        """
+        with self._lock:
+            for record in records:
+                inverter_sn = record.get("inverterSn")
+                if not inverter_sn:
+                    continue
+                try:
+                    history = self._get(inverter_sn)
+                except ValueError as err:
+                    _LOGGER.debug("Not recording history: %s", err)
+                    continue
+                history.append(sample_time(record, poll_time), record)
+
+    def query(
+        self, inverter_sn: str, start: float, end: float, keys: list[str] | None = None
+    ) -> dict[str, list]:
+        """Return an inverter's samples between start and end.
+
+        Files not opened for writing by this store are opened read-only, so
+        a query never creates or resets one.
+        """
+        unknown = [key for key in keys or [] if key not in self.keys]
+        if unknown:
+            raise ValueError(f"Unknown history keys: {', '.join(unknown)}")
+        path = self._path(inverter_sn)
+        with self._lock:
+            history = self._buffers.get(inverter_sn)
+            if history is not None:
+                return history.query(start, end, keys)
+            try:
+                history = InverterHistory(path, self.keys, self.capacity, writable=False)
+            except FileNotFoundError:
+                return {"timestamp": []}
+            except ValueError as err:
+                _LOGGER.debug("Not reading history: %s", err)
+                return {"timestamp": []}
+            try:
+                return history.query(start, end, keys)
+            finally:
+                history.close()
+
+    def close(self) -> None:
+        """Close every open ring buffer."""
+        with self._lock:
+            for history in self._buffers.values():
+                history.close()
+            self._buffers.clear()
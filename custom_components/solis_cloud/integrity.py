@@ -0,0 +1,208 @@
+"""Validation of the cumulative energy counters reported by Solis Cloud.
+
+The cloud occasionally reports a daily counter as 0, or lower than a previous
+poll, in the middle of the day. Home Assistant treats any decrease of a
+TOTAL_INCREASING sensor as a meter reset and would count the day's energy
+twice, so such glitches are replaced by the last accepted value. When a
+spike was accepted instead, the lower values that follow are taken as the
+new baseline once they have been reported consistently for a few polls.
+"""
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from .values import as_float, to_kwh
+
+_LOGGER = logging.getLogger(__name__)
+
+# Daily counters and the lifetime counter each one accumulates into
+DAILY_TOTAL_PAIRS = {
+    "eToday": "eTotal",
+    "gridPurchasedTodayEnergy": "gridPurchasedTotalEnergy",
+    "gridSellTodayEnergy": "gridSellTotalEnergy",
+    "batteryTodayChargeEnergy": "batteryTotalChargeEnergy",
+    "batteryTodayDischargeEnergy": "batteryTotalDischargeEnergy",
+    "homeLoadTodayEnergy": "homeLoadTotalEnergy",
+}
+
+_TOTAL_KEYS = frozenset(DAILY_TOTAL_PAIRS.values())
+
+# Daily counters may reset this long either side of local midnight
+ROLLOVER_WINDOW = timedelta(minutes=30)
+
+# Lifetime counters are often reported with 1 kWh resolution; coarser
+# counters are given one step of their own resolution instead
+CROSS_CHECK_TOLERANCE = 1.0
+
+# Consecutive non-decreasing readings below the accepted value that replace it
+RECOVERY_READINGS = 3
+
+
+def _step_kwh(record: dict[str, Any], key: str) -> float | None:
+    """Return one step of a counter's reported resolution in kWh.
+
+    The step is read from the decimals of the reported value, so "12.34" in
+    MWh moves in 10 kWh steps. Returns None for exponent notation.
+    """
+    text = str(record.get(key, "")).strip()
+    if "e" in text.lower():
+        return None
+    decimals = len(text.partition(".")[2])
+    return to_kwh(record, key, 10.0 ** -decimals)
+
+
+def _near_midnight(now: datetime) -> bool:
+    """Return True when now lies within the rollover window of midnight."""
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    since = now - midnight
+    return since <= ROLLOVER_WINDOW or timedelta(days=1) - since <= ROLLOVER_WINDOW
+
+
+class CounterValidator:
+    """Track the last accepted counter values per inverter and repair glitches."""
+
+    def __init__(self, keys: tuple[str, ...]) -> None:
+        """Initialize the validator for the given TOTAL_INCREASING keys."""
+        # Lifetime counters are validated first so daily counters are
+        # cross-checked against already repaired totals
+        self.keys = tuple(sorted(keys, key=lambda key: key in DAILY_TOTAL_PAIRS))
+        self.corrections = 0
+        # (inverter_sn, key) -> (raw value, value in kWh, local date accepted)
+        self._last: dict[tuple[str, str], tuple[Any, float, Any]] = {}
+        # (inverter_sn, total key) -> last accepted total in kWh before today
+        self._previous_day_total: dict[tuple[str, str], float] = {}
+        # (inverter_sn, total key) -> one step of its reported resolution in kWh
+        self._total_step: dict[tuple[str, str], float] = {}
+        # (inverter_sn, key) -> (consecutive rejected readings, last one in kWh)
+        self._rejected: dict[tuple[str, str], tuple[int, float]] = {}
+
+    def load(self, stored: dict[str, Any] | None) -> None:
+        """Restore the accepted values saved by as_dict."""
+        if not stored:
+            return
+        for inverter_sn, counters in stored.get("last", {}).items():
+            for key, (raw, kwh, day) in counters.items():
+                self._last[(inverter_sn, key)] = (raw, kwh, date.fromisoformat(day))
+        for inverter_sn, totals in stored.get("previous_day_total", {}).items():
+            for key, kwh in totals.items():
+                self._previous_day_total[(inverter_sn, key)] = kwh
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the accepted values to persist."""
+        last: dict[str, dict[str, list]] = {}
+        # Copied in one step, as polls update the values from the executor
+        for (inverter_sn, key), (raw, kwh, day) in list(self._last.items()):
+            last.setdefault(inverter_sn, {})[key] = [raw, kwh, day.isoformat()]
+        previous_day_total: dict[str, dict[str, float]] = {}
+        for (inverter_sn, key), kwh in list(self._previous_day_total.items()):
+            previous_day_total.setdefault(inverter_sn, {})[key] = kwh
+        return {"last": last, "previous_day_total": previous_day_total}
+
+    def process(self, records: list[dict[str, Any]], now: datetime) -> int:
+        """Validate the counters of every record in place.
+
+        Returns the number of values that were replaced.
+        """
+        corrected = 0
+        for record in records:
+            inverter_sn = record.get("inverterSn")
+            if inverter_sn:
+                corrected += self._process_record(inverter_sn, record, now)
+        self.corrections += corrected
+        return corrected
+
+    def _process_record(
+        self, inverter_sn: str, record: dict[str, Any], now: datetime
+    ) -> int:
+        """Validate the counters of a single inverter."""
+        today = now.date()
+        rollover = _near_midnight(now)
+        corrected = 0
+
+        for key in self.keys:
+            if key not in record:
+                continue
+            state_key = (inverter_sn, key)
+            last = self._last.get(state_key)
+            value = as_float(record[key])
+
+            if value is None:
+                if last is not None:
+                    record[key] = last[0]
+                    corrected += 1
+                continue
+
+            kwh = to_kwh(record, key, value)
+            if last is not None and kwh < last[1]:
+                is_daily = key in DAILY_TOTAL_PAIRS
+                new_day = last[2] != today
+                if (not is_daily or not (rollover or new_day)) and not self._recovered(
+                    state_key, kwh
+                ):
+                    _LOGGER.debug(
+                        "Rejecting decrease of %s for %s: %s -> %s",
+                        key, inverter_sn, last[0], record[key],
+                    )
+                    record[key] = last[0]
+                    corrected += 1
+                    continue
+
+            if key in DAILY_TOTAL_PAIRS and not self._daily_consistent(
+                inverter_sn, key, kwh, today
+            ):
+                if last is not None:
+                    record[key] = last[0]
+                    corrected += 1
+                    continue
+
+            if last is not None and last[2] != today:
+                self._previous_day_total[state_key] = last[1]
+            self._last[state_key] = (record[key], kwh, today)
+            if key in _TOTAL_KEYS and (step := _step_kwh(record, key)) is not None:
+                self._total_step[state_key] = step
+            self._rejected.pop(state_key, None)
+
+        return corrected
+
+    def _recovered(self, state_key: tuple[str, str], kwh: float) -> bool:
+        """Count a reading below the accepted value; True once it is the new baseline.
+
+        Lower readings that keep rising or holding for RECOVERY_READINGS polls
+        show that the accepted value was a spike.
+        """
+        count, previous = self._rejected.get(state_key, (0, kwh))
+        count = count + 1 if kwh >= previous else 1
+        if count < RECOVERY_READINGS:
+            self._rejected[state_key] = (count, kwh)
+            return False
+        _LOGGER.warning(
+            "Accepting %s for %s after %d consistent readings below %s",
+            state_key[1], state_key[0], count, self._last[state_key][0],
+        )
+        return True
+
+    def _daily_consistent(
+        self, inverter_sn: str, key: str, daily_kwh: float, today: Any
+    ) -> bool:
+        """Cross-check a daily counter against its lifetime counter.
+
+        The energy counted today cannot exceed what the lifetime counter has
+        gained since the last value it reported on a previous day.
+        """
+        total_key = (inverter_sn, DAILY_TOTAL_PAIRS[key])
+        previous_total = self._previous_day_total.get(total_key)
+        last_total = self._last.get(total_key)
+        if previous_total is None or last_total is None or last_total[2] != today:
+            return True
+
+        gained = last_total[1] - previous_total
+        tolerance = max(CROSS_CHECK_TOLERANCE, self._total_step.get(total_key, 0.0))
+        if daily_kwh > gained + tolerance:
+            _LOGGER.debug(
+                "Rejecting %s for %s: %.2f kWh today but %s grew by %.2f kWh",
+                key, inverter_sn, daily_kwh, total_key[1], gained,
+            )
+            return False
+        return True
@@ -0,0 +1,229 @@
+"""Local Modbus TCP transport for Solis hybrid inverters.
+
+Reads the inverter's input registers through a Modbus TCP data logger (or a
+RS485 to TCP gateway) and maps them onto the same keys as the cloud API, so
+every sensor works unchanged with second-level polling. Point the host and
+port at a pymodbus simulator to run it without hardware.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from .profiling import Profiler
+from .transport import InverterTransport
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_PORT = 502
+DEFAULT_SLAVE = 1
+DEFAULT_MODBUS_SCAN_INTERVAL = 10
+
+U16 = "u16"
+S16 = "s16"
+U32 = "u32"
+S32 = "s32"
+
+_WIDTHS = {U16: 1, S16: 1, U32: 2, S32: 2}
+
+# Input registers of the Solis hybrid protocol: (api key, address, type, scale)
+REGISTER_MAP = (
+    ("eTotal", 33029, U32, 1),
+    ("eMonth", 33031, U32, 1),
+    ("eToday", 33035, U16, 0.1),
+    ("eYear", 33037, U32, 1),
+    ("uPv1", 33049, U16, 0.1),
+    ("iPv1", 33050, U16, 0.1),
+    ("uPv2", 33051, U16, 0.1),
+    ("iPv2", 33052, U16, 0.1),
+    ("uPv3", 33053, U16, 0.1),
+    ("iPv3", 33054, U16, 0.1),
+    ("uPv4", 33055, U16, 0.1),
+    ("iPv4", 33056, U16, 0.1),
+    ("uAc1", 33073, U16, 0.1),
+    ("uAc2", 33074, U16, 0.1),
+    ("uAc3", 33075, U16, 0.1),
+    ("iAc1", 33076, U16, 0.1),
+    ("iAc2", 33077, U16, 0.1),
+    ("iAc3", 33078, U16, 0.1),
+    ("pac", 33079, S32, 1),
+    ("inverterTemperature", 33093, S16, 0.1),
+    ("fac", 33094, U16, 0.01),
+    ("currentState", 33095, U16, 1),
+    ("psum", 33130, S32, 1),
+    ("batteryVoltage", 33133, U16, 0.1),
+    ("batteryCurrent", 33134, S16, 0.1),
+    ("batteryDirection", 33135, U16, 1),
+    ("batteryCapacitySoc", 33139, U16, 1),
+    ("soh", 33140, U16, 1),
+    ("totalLoadPower", 33147, U16, 1),
+    ("familyLoadPower", 33148, U16, 1),
+    ("batteryPower", 33149, S32, 1),
+    ("batteryTotalChargeEnergy", 33161, U32, 1),
+    ("batteryTodayChargeEnergy", 33163, U16, 0.1),
+    ("batteryTotalDischargeEnergy", 33165, U32, 1),
+    ("batteryTodayDischargeEnergy", 33167, U16, 0.1),
+    ("gridPurchasedTotalEnergy", 33169, U32, 1),
+    ("gridPurchasedTodayEnergy", 33171, U16, 0.1),
+    ("gridSellTotalEnergy", 33173, U32, 1),
+    ("gridSellTodayEnergy", 33175, U16, 0.1),
+    ("homeLoadTotalEnergy", 33177, U32, 1),
+    ("homeLoadTodayEnergy", 33179, U16, 0.1),
+)
+
+# Registers closer than this are read in one request, including the gap
+MAX_REGISTER_GAP = 20
+MAX_BLOCK_SIZE = 100
+
+
+def plan_blocks(
+    register_map: tuple = REGISTER_MAP,
+    max_gap: int = MAX_REGISTER_GAP,
+    max_size: int = MAX_BLOCK_SIZE,
+) -> list[tuple[int, int]]:
+    """Group the mapped registers into contiguous (start, count) reads."""
+    spans = sorted(
+        (address, address + _WIDTHS[kind]) for _, address, kind, _ in register_map
+    )
+    blocks: list[list[int]] = []
+    for start, end in spans:
+        if blocks:
+            block = blocks[-1]
+            if start - block[1] <= max_gap and max(end, block[1]) - block[0] <= max_size:
+                block[1] = max(end, block[1])
+                continue
+        blocks.append([start, end])
+    return [(start, end - start) for start, end in blocks]
+
+
+def _decode(registers: dict[int, int], address: int, kind: str) -> int | None:
+    """Decode a big-endian register value, or None if not read."""
+    high = registers.get(address)
+    if high is None:
+        return None
+    if kind in (U16, S16):
+        value = high
+        if kind == S16 and value >= 0x8000:
+            value -= 0x10000
+        return value
+    low = registers.get(address + 1)
+    if low is None:
+        return None
+    value = (high << 16) | low
+    if kind == S32 and value >= 0x80000000:
+        value -= 0x100000000
+    return value
+
+
+def decode_registers(registers: dict[int, int]) -> dict[str, Any]:
+    """Map raw register values onto API keys."""
+    record: dict[str, Any] = {}
+    for key, address, kind, scale in REGISTER_MAP:
+        value = _decode(registers, address, kind)
+        if value is not None:
+            record[key] = round(value * scale, 3) if scale != 1 else value
+
+    # The battery power register is a magnitude; positive means charging
+    direction = record.pop("batteryDirection", None)
+    if direction == 1 and "batteryPower" in record:
+        record["batteryPower"] = -abs(record["batteryPower"])
+    for string in range(1, 5):
+        voltage = record.get(f"uPv{string}")
+        current = record.get(f"iPv{string}")
+        if voltage is not None and current is not None:
+            record[f"pow{string}"] = round(voltage * current, 1)
+    return record
+
+
+class SolisModbusTransport(InverterTransport):
+    """Poll one inverter over Modbus TCP."""
+
+    default_scan_interval = DEFAULT_MODBUS_SCAN_INTERVAL
+    min_scan_interval = 2
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        slave: int,
+        inverter_sn: str,
+        station_name: str,
+        profiler: Profiler | None = None,
+    ) -> None:
+        """Initialize the transport; the connection is opened on first use."""
+        super().__init__(profiler or Profiler(inverter_sn))
+        self.host = host
+        self.port = port
+        self.slave = slave
+        self.inverter_sn = inverter_sn
+        self.station_name = station_name
+        self.inverter_serials = [inverter_sn]
+        self._blocks = plan_blocks()
+        self._client = None
+
+    def _connect(self):
+        """Return a connected pymodbus client."""
+        if self._client is None:
+            try:
+                from pymodbus.client import ModbusTcpClient  # pylint: disable=import-outside-toplevel
+            except ImportError as err:
+                raise ModbusUnavailable("pymodbus is not installed") from err
+            self._client = ModbusTcpClient(self.host, port=self.port, timeout=self.timeout)
+        if not self._client.connected and not self._client.connect():
+            raise ModbusUnavailable(f"Cannot connect to {self.host}:{self.port}")
+        return self._client
+
+    def _read_block(self, client, start: int, count: int) -> list[int]:
+        """Read one contiguous block of input registers."""
+        try:
+            result = client.read_input_registers(start, count=count, slave=self.slave)
+        except TypeError:
+            # pymodbus 3.9 renamed the unit argument
+            result = client.read_input_registers(start, count=count, device_id=self.slave)
+        if result.isError():
+            raise ModbusUnavailable(f"Error reading registers {start}-{start + count - 1}: {result}")
+        return result.registers
+
+    def get_inverter_data(self) -> dict[str, Any]:
+        """Read every mapped register and return a single inverter record."""
+        if self.inverter_sn in self.excluded_serials:
+            return {"records": []}
+
+        client = self._connect()
+        registers: dict[int, int] = {}
+        try:
+            for start, count in self._blocks:
+                with self.profiler.span("modbus.read"):
+                    values = self._read_block(client, start, count)
+                registers.update(zip(range(start, start + len(values)), values))
+        except Exception:
+            # Drop the connection so the next poll reconnects cleanly
+            self.close()
+            raise
+
+        values = decode_registers(registers)
+
+        def build() -> dict[str, Any]:
+            values.update(
+                {
+                    "id": self.inverter_sn,
+                    "inverterSn": self.inverter_sn,
+                    "stationName": self.station_name,
+                    "state": "1",
+                }
+            )
+            return values
+
+        unchanged: set[str] = set()
+        record = self._reuse_unchanged(self.inverter_sn, values, build, unchanged)
+        return {"records": [record], "unchanged": unchanged}
+
+    def close(self) -> None:
+        """Close the Modbus connection."""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+class ModbusUnavailable(Exception):
+    """Raised when the inverter cannot be read over Modbus."""
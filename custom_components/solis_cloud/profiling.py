@@ -0,0 +1,172 @@
+"""Opt-in profiling of the polling hot path.
+
+Spans time the stages of a poll (request signing, network, parsing, entity
+updates). When profiling is off a span is a shared no-op context manager, so
+the instrumented code pays a single attribute check.
+"""
+from __future__ import annotations
+
+import contextlib
+import cProfile
+import logging
+import os
+import threading
+import time
+from collections.abc import Iterator
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+MODE_OFF = "off"
+MODE_TIMING = "timing"
+MODE_CPROFILE = "cprofile"
+MODE_PYINSTRUMENT = "pyinstrument"
+
+PROFILER_MODES = (MODE_OFF, MODE_TIMING, MODE_CPROFILE, MODE_PYINSTRUMENT)
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+class Capture:
+    """A whole-poll capture in progress; clear keep to discard its snapshot."""
+
+    __slots__ = ("keep",)
+
+    def __init__(self) -> None:
+        self.keep = True
+
+
+class Profiler:
+    """Collect span timings and optional whole-poll profiles."""
+
+    def __init__(self, name: str) -> None:
+        """Initialize a disabled profiler."""
+        self.name = name
+        self.mode = MODE_OFF
+        self.directory: str | None = None
+        # span name -> [count, total seconds, max seconds]
+        self._timings: dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Return True when any profiling mode is active."""
+        return self.mode != MODE_OFF
+
+    @property
+    def capturing(self) -> bool:
+        """Return True when polls are profiled, which only sees their own thread."""
+        return self.mode in (MODE_CPROFILE, MODE_PYINSTRUMENT)
+
+    def set_mode(self, mode: str, directory: str | None = None) -> None:
+        """Switch the profiling mode at runtime."""
+        if mode not in PROFILER_MODES:
+            raise ValueError(f"Unknown profiler mode: {mode}")
+        if mode == MODE_PYINSTRUMENT:
+            try:
+                import pyinstrument  # noqa: F401  pylint: disable=import-outside-toplevel,unused-import
+            except ImportError as err:
+                raise ValueError("pyinstrument is not installed") from err
+        with self._lock:
+            self.mode = mode
+            self.directory = directory
+            self._timings.clear()
+        _LOGGER.info("Profiler for %s set to %s", self.name, mode)
+
+    def span(self, name: str):
+        """Return a context manager timing the named stage."""
+        if self.mode == MODE_OFF:
+            return _NULL_CONTEXT
+        return self._span(name)
+
+    @contextlib.contextmanager
+    def _span(self, name: str) -> Iterator[None]:
+        """Time the wrapped block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                timing = self._timings.get(name)
+                if timing is None:
+                    self._timings[name] = [1, elapsed, elapsed]
+                else:
+                    timing[0] += 1
+                    timing[1] += elapsed
+                    timing[2] = max(timing[2], elapsed)
+
+    def capture(self):
+        """Return a context manager profiling a whole poll in this thread.
+
+        It yields a Capture, or None when not capturing.
+        """
+        if self.mode == MODE_CPROFILE:
+            return self._capture_cprofile()
+        if self.mode == MODE_PYINSTRUMENT:
+            return self._capture_pyinstrument()
+        return _NULL_CONTEXT
+
+    def _snapshot_path(self, extension: str) -> str | None:
+        """Return a new snapshot file path, or None without a directory."""
+        if self.directory is None:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        return os.path.join(self.directory, f"{self.name}-{stamp}.{extension}")
+
+    @contextlib.contextmanager
+    def _capture_cprofile(self) -> Iterator[Capture]:
+        """Profile the wrapped block with cProfile and dump the stats."""
+        capture = Capture()
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield capture
+        finally:
+            profile.disable()
+            if capture.keep and (path := self._snapshot_path("prof")) is not None:
+                profile.dump_stats(path)
+                _LOGGER.info("Wrote cProfile snapshot to %s", path)
+
+    @contextlib.contextmanager
+    def _capture_pyinstrument(self) -> Iterator[Capture]:
+        """Profile the wrapped block with pyinstrument and write an HTML report."""
+        from pyinstrument import Profiler as Sampler  # pylint: disable=import-outside-toplevel
+
+        capture = Capture()
+        sampler = Sampler()
+        sampler.start()
+        try:
+            yield capture
+        finally:
+            sampler.stop()
+            if capture.keep and (path := self._snapshot_path("html")) is not None:
+                with open(path, "w", encoding="utf-8") as file:
+                    file.write(sampler.output_html())
+                _LOGGER.info("Wrote pyinstrument snapshot to %s", path)
+
+    def flush(self) -> dict[str, Any]:
+        """Log and reset the span timings collected since the last flush."""
+        with self._lock:
+            timings = self._timings
+            self._timings = {}
+        if not timings:
+            return {}
+        summary = {
+            name: {
+                "count": count,
+                "total_ms": round(total * 1000, 3),
+                "max_ms": round(longest * 1000, 3),
+            }
+            for name, (count, total, longest) in sorted(timings.items())
+        }
+        _LOGGER.info(
+            "Poll timings for %s: %s",
+            self.name,
+            ", ".join(
+                f"{name}={value['total_ms']}ms/{value['count']}"
+                for name, value in summary.items()
+            ),
+        )
+        return summary
@@ -0,0 +1,134 @@
+"""Redacted captures of raw Solis Cloud responses, and reading them back.
+
+A capture is a gzip JSON lines file. The first line is a header naming the
+format and schema version; each further line holds every request and raw
+response of one poll. Location and account fields are removed, and serial
+numbers and station names are replaced with pseudonyms that stay consistent
+within the capture, so it can be attached to a bug report.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+from typing import Any
+
+CAPTURE_FORMAT = "solis_cloud_capture"
+SCHEMA_VERSION = 1
+
+REDACTED = "**REDACTED**"
+
+# Fields dropped from captures
+REDACT_KEYS = frozenset({
+    "addr", "address", "fullAddress", "latitude", "longitude",
+    "userId", "userName", "account", "email", "phone", "mobile",
+    "cityStr", "countyStr", "regionStr", "picUrl",
+})
+
+# Fields replaced with a stable pseudonym, as requests refer to them
+PSEUDONYM_KEYS = frozenset({"sn", "inverterSn", "collectorSn", "stationName"})
+
+
+class ResponseRecorder:
+    """Write the responses of the next polls to a capture file."""
+
+    def __init__(self, path: str, polls: int) -> None:
+        """Create the capture file; recording stops after polls polls."""
+        self.path = path
+        self.remaining = polls
+        self._lock = threading.Lock()
+        self._poll: dict[str, Any] | None = None
+        # Random per capture, so pseudonyms cannot be matched across captures
+        self._salt = os.urandom(16)
+        self._pseudonyms: dict[str, str] = {}
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._write({"format": CAPTURE_FORMAT, "schema": SCHEMA_VERSION, "created": time.time()})
+
+    def _write(self, line: dict[str, Any]) -> None:
+        """Append one JSON line to the capture."""
+        self._file.write(json.dumps(line, separators=(",", ":")))
+        self._file.write("\n")
+
+    def _pseudonym(self, value: Any) -> str:
+        """Return the stable pseudonym of a value."""
+        value = str(value)
+        pseudonym = self._pseudonyms.get(value)
+        if pseudonym is None:
+            digest = hashlib.sha256(self._salt + value.encode("utf-8")).hexdigest()
+            pseudonym = self._pseudonyms[value] = f"X{digest[:15].upper()}"
+        return pseudonym
+
+    def _redact(self, value: Any) -> Any:
+        """Return a copy of value with private fields redacted."""
+        if isinstance(value, dict):
+            redacted = {}
+            for key, item in value.items():
+                if key in REDACT_KEYS:
+                    redacted[key] = REDACTED
+                elif key in PSEUDONYM_KEYS and item not in (None, ""):
+                    redacted[key] = self._pseudonym(item)
+                else:
+                    redacted[key] = self._redact(item)
+            return redacted
+        if isinstance(value, list):
+            return [self._redact(item) for item in value]
+        return value
+
+    def start_poll(self, poll_time: float) -> None:
+        """Start collecting the responses of a poll."""
+        with self._lock:
+            self._poll = {"time": poll_time, "responses": []}
+
+    def record(self, endpoint: str, payload: dict[str, Any], response: Any) -> None:
+        """Add a raw response to the current poll; may run on any thread."""
+        if self._poll is None:
+            return
+        entry = {
+            "endpoint": endpoint,
+            "payload": self._redact(payload),
+            "response": self._redact(response),
+        }
+        with self._lock:
+            if self._poll is not None:
+                self._poll["responses"].append(entry)
+
+    def end_poll(self, made_requests: bool = True) -> bool:
+        """Write the current poll; return True once the capture is complete.
+
+        A poll that made no requests, as on most scheduler ticks, is dropped
+        and does not count towards the requested polls.
+        """
+        with self._lock:
+            if self._file.closed:
+                return True
+            if self._poll is not None and not made_requests:
+                self._poll = None
+            elif self._poll is not None:
+                self._write(self._poll)
+                self._poll = None
+                self.remaining -= 1
+            return self.remaining <= 0
+
+    def close(self) -> None:
+        """Finish the capture file."""
+        with self._lock:
+            self._file.close()
+
+
+def read_capture(path: str) -> Iterator[dict[str, Any]]:
+    """Yield the polls of a capture file, checking its header."""
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        header = json.loads(file.readline() or "{}")
+        if header.get("format") != CAPTURE_FORMAT:
+            raise ValueError(f"{path} is not a Solis Cloud capture")
+        if header.get("schema") != SCHEMA_VERSION:
+            raise ValueError(
+                f"Unsupported capture schema {header.get('schema')}, expected {SCHEMA_VERSION}"
+            )
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
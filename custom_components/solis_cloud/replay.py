@@ -0,0 +1,68 @@
+"""Offline replay of a recorded capture through the cloud client.
+
+ReplayAPI is the cloud client with its requests answered from a capture, one
+poll at a time, so get_inverter_data runs exactly as it did when recording:
+the same inverters are fetched, in the same order, with no network or waits.
+"""
+from __future__ import annotations
+
+import json
+from collections import deque
+from typing import Any
+
+from .api import SolisAPIError, SolisCloudAPI
+from .scheduler import InverterScheduler
+
+
+def _request_key(endpoint: str, payload: dict[str, Any]) -> tuple[str, str]:
+    """Return the lookup key of a request."""
+    return endpoint, json.dumps(payload, sort_keys=True, separators=(",", ":"))
+
+
+class _ReplayScheduler(InverterScheduler):
+    """Fetch exactly the inverters whose detail was recorded in the poll."""
+
+    def __init__(self) -> None:
+        super().__init__(0)
+        self.recorded: set[str] = set()
+
+    def due(self, inverter_sn: str, now: float) -> bool:
+        return inverter_sn in self.recorded
+
+
+class ReplayAPI(SolisCloudAPI):
+    """Cloud client answering requests from recorded responses."""
+
+    def __init__(self) -> None:
+        """Initialize the client without credentials."""
+        super().__init__("replay", "replay")
+        self.scheduler = _ReplayScheduler()
+        self._responses: dict[tuple[str, str], deque] = {}
+
+    def load_poll(self, poll: dict[str, Any]) -> None:
+        """Serve the responses of one recorded poll to the next fetch.
+
+        The station and inverter lists are requested again whenever the
+        poll recorded them.
+        """
+        self._responses = {}
+        recorded = set()
+        for entry in poll["responses"]:
+            key = _request_key(entry["endpoint"], entry["payload"])
+            self._responses.setdefault(key, deque()).append(entry["response"])
+            if entry["endpoint"] == "/v1/api/inverterDetail":
+                recorded.add(entry["payload"].get("sn"))
+            elif entry["endpoint"] == "/v1/api/userStationList":
+                self._topology = None
+        self.scheduler.recorded = recorded
+
+    def _post(self, endpoint: str, payload: dict) -> dict[str, Any]:
+        """Return the recorded response of a request."""
+        self.request_count += 1
+        responses = self._responses.get(_request_key(endpoint, payload))
+        if not responses:
+            raise SolisAPIError(f"No recorded response for {endpoint} {payload}")
+        data = responses.popleft()
+        if data.get("success") is not True:
+            raise SolisAPIError(data.get("message", "Unknown error"))
+        return data.get("data", {})
@@ -0,0 +1,105 @@
+"""Per-inverter refresh timers for the cloud client.
+
+Each inverter has its own due time, so the coordinator can tick often while
+every inverter is fetched at its own pace: spread evenly over the polling
+interval, aligned with its logger's uploads, and backed off on its own when
+its requests fail.
+"""
+from __future__ import annotations
+
+import zlib
+
+from .windows import PollPlan
+
+# Coordinator tick used to service the per-inverter timers
+SCHEDULER_TICK = 30
+
+# Failed inverters wait interval * 2 ** failures, up to this many seconds
+MAX_BACKOFF = 3600
+
+
+class InverterScheduler:
+    """Decide which inverters to fetch on each coordinator tick."""
+
+    def __init__(self, interval: float) -> None:
+        """Initialize the scheduler with the per-inverter polling interval."""
+        self.interval = interval
+        # Faster polling around daily transitions, when planned
+        self.plan: PollPlan | None = None
+        # No inverter is fetched before this time
+        self.paused_until = 0.0
+        self._due: dict[str, float] = {}
+        self._failures: dict[str, int] = {}
+
+    def _phase(self, inverter_sn: str) -> float:
+        """Return a stable fraction of the interval spreading inverters."""
+        return (zlib.crc32(inverter_sn.encode("utf-8")) % 1000) / 1000
+
+    def interval_at(self, now: float) -> float:
+        """Return the polling interval at now."""
+        plan = self.plan
+        if plan is not None and plan.start <= now < plan.end:
+            return plan.interval_at(now)
+        return self.interval
+
+    def max_interval(self) -> float:
+        """Return the longest polling interval in effect, including the plan's."""
+        plan = self.plan
+        if plan is not None:
+            return max(self.interval, plan.slow_interval)
+        return self.interval
+
+    def due(self, inverter_sn: str, now: float) -> bool:
+        """Return True when the inverter should be fetched now."""
+        if now < self.paused_until:
+            return False
+        due = self._due.get(inverter_sn)
+        return due is None or now >= due
+
+    def failing(self, inverter_sn: str) -> bool:
+        """Return True when the inverter's last fetch failed."""
+        return inverter_sn in self._failures
+
+    def record_success(
+        self, inverter_sn: str, now: float, next_upload: float | None
+    ) -> None:
+        """Schedule the next fetch after a successful one.
+
+        The first fetch sets the inverter's phase within the interval. Once
+        the logger's upload cadence is known, the fetch waits for the next
+        expected upload. A planned window opening earlier brings it forward.
+        """
+        first = inverter_sn not in self._due
+        self._failures.pop(inverter_sn, None)
+        interval = self.interval_at(now)
+        due = now + interval
+        if first:
+            due = now + self._phase(inverter_sn) * interval
+        if next_upload is not None:
+            due = max(due, next_upload)
+        if self.plan is not None:
+            window_start = self.plan.next_window_start(now)
+            if window_start is not None and due > window_start:
+                due = window_start + self._phase(inverter_sn) * self.plan.fast_interval
+        self._due[inverter_sn] = due
+
+    def record_failure(self, inverter_sn: str, now: float) -> None:
+        """Back off an inverter whose fetch failed."""
+        failures = self._failures.get(inverter_sn, 0) + 1
+        self._failures[inverter_sn] = failures
+        self._due[inverter_sn] = now + min(
+            self.interval * 2 ** (failures - 1), MAX_BACKOFF
+        )
+
+    def expedite(self, inverter_sn: str, when: float) -> None:
+        """Fetch an inverter no later than when."""
+        due = self._due.get(inverter_sn)
+        if due is None or when < due:
+            self._due[inverter_sn] = when
+
+    def forget(self, keep: set[str]) -> None:
+        """Drop timers of inverters no longer listed."""
+        for inverter_sn in list(self._due):
+            if inverter_sn not in keep:
+                self._due.pop(inverter_sn, None)
+                self._failures.pop(inverter_sn, None)
@@ -1,15 +1,18 @@
 """Platform for sensor integration."""
 from __future__ import annotations
 
+import asyncio
 import logging
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
+    SensorEntityDescription,
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
+    EntityCategory,
     UnitOfElectricCurrent,
     UnitOfElectricPotential,
     UnitOfEnergy,
@@ -18,13 +21,18 @@ from homeassistant.const import (
     UnitOfTemperature,
     PERCENTAGE,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
     DataUpdateCoordinator,
 )
+from homeassistant.util import dt as dt_util, slugify
 
+from .aggregate import AGGREGATE_KEYS
+from .energy import INTEGRATED_CHANNELS
+from .freshness import TIMESTAMP_KEY, data_timestamp
 from .const import DOMAIN
 
 _LOGGER = logging.getLogger(__name__)
@@ -100,12 +108,110 @@ SENSOR_DEFINITIONS = [
     ("currentState", "Operating State", None, None, None),
 ]
 
+SENSOR_KEYS = tuple(definition[0] for definition in SENSOR_DEFINITIONS)
+
+# Cumulative counters that Home Assistant expects never to decrease
+COUNTER_KEYS = tuple(
+    definition[0]
+    for definition in SENSOR_DEFINITIONS
+    if definition[4] == SensorStateClass.TOTAL_INCREASING
+)
+
 # Computed sensors derived from other API fields: (key, name, source_key, unit, device_class, state_class)
 COMPUTED_SENSOR_DEFINITIONS = [
     ("gridExportPower", "Grid Export Power", "psum", UnitOfPower.WATT, SensorDeviceClass.POWER, SensorStateClass.MEASUREMENT),
     ("gridImportPower", "Grid Import Power", "psum", UnitOfPower.WATT, SensorDeviceClass.POWER, SensorStateClass.MEASUREMENT),
 ]
 
+# Energy integrated locally from power samples: (key, name)
+INTEGRATED_SENSOR_DEFINITIONS = [
+    ("pvEnergy", "Integrated PV Energy"),
+    ("gridExportEnergy", "Integrated Grid Export"),
+    ("gridImportEnergy", "Integrated Grid Import"),
+    ("batteryChargeEnergy", "Integrated Battery Charge"),
+    ("batteryDischargeEnergy", "Integrated Battery Discharge"),
+]
+
+_INTEGRATED_SOURCES = {key: source for key, source, _ in INTEGRATED_CHANNELS}
+
+UPLOAD_SENSOR_NAME = "Last Upload"
+
+# Every per-inverter sensor key, selectable in the options
+SENSOR_KEY_NAMES = {
+    **{definition[0]: definition[1] for definition in SENSOR_DEFINITIONS},
+    **{definition[0]: definition[1] for definition in COMPUTED_SENSOR_DEFINITIONS},
+    **dict(INTEGRATED_SENSOR_DEFINITIONS),
+    TIMESTAMP_KEY: UPLOAD_SENSOR_NAME,
+}
+
+
+# Station and account totals reuse the per-inverter definitions of their keys
+AGGREGATE_SENSOR_DEFINITIONS = [
+    definition for definition in SENSOR_DEFINITIONS if definition[0] in AGGREGATE_KEYS
+]
+
+# Entities are handed to Home Assistant in chunks of this many, yielding to
+# the event loop between chunks
+ENTITY_CHUNK_SIZE = 250
+
+_STATE_MAP = {"1": "Online", "2": "Offline", "3": "Alarm"}
+
+
+def _description(
+    key: str,
+    name: str,
+    unit: str | None,
+    device_class: SensorDeviceClass | None,
+    state_class: SensorStateClass | None,
+    entity_category: EntityCategory | None = None,
+) -> SensorEntityDescription:
+    """Return the shared entity description of a sensor definition."""
+    return SensorEntityDescription(
+        key=key,
+        name=name,
+        native_unit_of_measurement=unit,
+        device_class=device_class,
+        state_class=state_class,
+        entity_category=entity_category,
+    )
+
+
+# Entity descriptions of every per-inverter sensor, built once at import
+SENSOR_DESCRIPTIONS: dict[str, SensorEntityDescription] = {
+    **{definition[0]: _description(*definition) for definition in SENSOR_DEFINITIONS},
+    **{
+        key: _description(key, name, unit, device_class, state_class)
+        for key, name, _, unit, device_class, state_class in COMPUTED_SENSOR_DEFINITIONS
+    },
+    **{
+        key: _description(
+            key, name, UnitOfEnergy.KILO_WATT_HOUR,
+            SensorDeviceClass.ENERGY, SensorStateClass.TOTAL_INCREASING,
+        )
+        for key, name in INTEGRATED_SENSOR_DEFINITIONS
+    },
+    TIMESTAMP_KEY: _description(
+        TIMESTAMP_KEY, UPLOAD_SENSOR_NAME, None, SensorDeviceClass.TIMESTAMP, None,
+        EntityCategory.DIAGNOSTIC,
+    ),
+}
+
+AGGREGATE_DESCRIPTIONS = [
+    SENSOR_DESCRIPTIONS[definition[0]] for definition in AGGREGATE_SENSOR_DEFINITIONS
+]
+
+_COMPUTED_SOURCES = {definition[0]: definition[2] for definition in COMPUTED_SENSOR_DEFINITIONS}
+
+
+def _inverter_device_info(inverter_sn: str) -> dict:
+    """Return the device information shared by an inverter's sensors."""
+    return {
+        "identifiers": {(DOMAIN, inverter_sn)},
+        "name": f"Solis Inverter {inverter_sn}",
+        "manufacturer": "Solis",
+        "model": "Solar Inverter",
+    }
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -116,63 +222,137 @@ async def async_setup_entry(
     coordinator = hass.data[DOMAIN][config_entry.entry_id]
 
     _LOGGER.info("Setting up Solis Cloud sensors")
-    _LOGGER.debug("Coordinator data: %s", coordinator.data)
 
+    # unique_id -> entity for every sensor added by this platform
+    known: dict[str, SensorEntity] = {}
+    synced: list = [None]
+
+    async def _async_add_in_chunks(entities: list[SensorEntity]) -> None:
+        """Add the entities a chunk at a time so large fleets do not stall the loop."""
+        for start in range(0, len(entities), ENTITY_CHUNK_SIZE):
+            async_add_entities(entities[start:start + ENTITY_CHUNK_SIZE])
+            await asyncio.sleep(0)
+
+    @callback
+    def _async_sync_entities() -> None:
+        """Add newly wanted sensors and remove deselected ones.
+
+        Runs after every refresh but only does work when the options or the
+        set of inverters changed, so existing entities are never recreated.
+        """
+        topology = (
+            coordinator.config_generation,
+            tuple(inverter.get("inverterSn") for inverter in _records(coordinator)),
+            # An inverter first seen while failing gets its sensors on recovery
+            frozenset((coordinator.data or {}).get("unavailable", ())),
+        )
+        if topology == synced[0]:
+            return
+        synced[0] = topology
+
+        entities, wanted = _build_entities(coordinator, config_entry, known)
+
+        stale = known.keys() - wanted
+        if stale:
+            registry = er.async_get(hass)
+            for unique_id in stale:
+                entity = known.pop(unique_id)
+                if entity.entity_id and registry.async_get(entity.entity_id):
+                    registry.async_remove(entity.entity_id)
+            _LOGGER.info("Removed %d sensor entities", len(stale))
+
+        if entities:
+            known.update((entity.unique_id, entity) for entity in entities)
+            _LOGGER.info("Created %d sensor entities", len(entities))
+            if len(entities) <= ENTITY_CHUNK_SIZE:
+                async_add_entities(entities)
+            else:
+                config_entry.async_create_task(hass, _async_add_in_chunks(entities))
+
+    _async_sync_entities()
+    config_entry.async_on_unload(coordinator.async_add_listener(_async_sync_entities))
+
+
+def _records(coordinator: DataUpdateCoordinator) -> list[dict]:
+    """Return the inverter records of the last refresh."""
+    if coordinator.data and "records" in coordinator.data:
+        return coordinator.data["records"]
+    return []
+
+
+def _build_entities(
+    coordinator: DataUpdateCoordinator,
+    config_entry: ConfigEntry,
+    known: dict[str, SensorEntity],
+) -> tuple[list[SensorEntity], set[str]]:
+    """Return the sensors to add and the unique ids of all wanted sensors.
+
+    Existing sensors stay wanted until their key is deselected or their
+    inverter or station is no longer listed.
+    """
     entities = []
+    wanted: set[str] = set()
 
-    if coordinator.data:
-        if "records" in coordinator.data:
-            _LOGGER.info("Found %d inverters", len(coordinator.data["records"]))
-            for inverter in coordinator.data["records"]:
-                inverter_id = inverter.get("id")
-                inverter_sn = inverter.get("inverterSn")
-                station_name = inverter.get("stationName", "Solis")
-
-                _LOGGER.info("Setting up inverter: %s (SN: %s)", station_name, inverter_sn)
-
-                for api_key, name, unit, device_class, state_class in SENSOR_DEFINITIONS:
-                    # Only create sensor if the API returned this field
-                    if api_key in inverter:
-                        entities.append(
-                            SolisCloudSensor(
-                                coordinator,
-                                inverter_id,
-                                inverter_sn,
-                                station_name,
-                                api_key,
-                                name,
-                                unit,
-                                device_class,
-                                state_class,
-                            )
-                        )
-                    else:
-                        _LOGGER.debug("Skipping sensor '%s' - key '%s' not in API data", name, api_key)
-
-                # Add computed sensors
-                for key, name, source_key, unit, device_class, state_class in COMPUTED_SENSOR_DEFINITIONS:
-                    if source_key in inverter:
-                        entities.append(
-                            SolisCloudComputedSensor(
-                                coordinator,
-                                inverter_id,
-                                inverter_sn,
-                                station_name,
-                                key,
-                                name,
-                                source_key,
-                                unit,
-                                device_class,
-                                state_class,
-                            )
-                        )
-        else:
-            _LOGGER.warning("No 'records' key in coordinator data. Data structure: %s", list(coordinator.data.keys()) if isinstance(coordinator.data, dict) else type(coordinator.data))
-    else:
+    if not coordinator.data:
         _LOGGER.warning("No data available from coordinator")
-
-    _LOGGER.info("Created %d sensor entities", len(entities))
-    async_add_entities(entities)
+        return entities, wanted
+    if "records" not in coordinator.data:
+        _LOGGER.warning("No 'records' key in coordinator data. Data structure: %s", list(coordinator.data.keys()) if isinstance(coordinator.data, dict) else type(coordinator.data))
+        return entities, wanted
+
+    # Only the sensors selected in the options
+    table = [row for row in _INVERTER_ENTITY_TABLE if row[0].key in coordinator.sensor_keys]
+    _LOGGER.debug("Found %d inverters", len(coordinator.data["records"]))
+    for inverter in coordinator.data["records"]:
+        inverter_id = inverter.get("id")
+        inverter_sn = inverter.get("inverterSn")
+        station_name = inverter.get("stationName", "Solis")
+        device_info = None
+
+        for description, source_key, entity_class in table:
+            unique_id = f"{inverter_sn}_{description.key}"
+            if unique_id in known:
+                # Kept while selected and listed, even if a payload lacks its field
+                wanted.add(unique_id)
+                continue
+            # Only create sensor if the API returned its source field
+            if source_key not in inverter:
+                continue
+            wanted.add(unique_id)
+            if device_info is None:
+                device_info = _inverter_device_info(inverter_sn)
+            entities.append(
+                entity_class(
+                    coordinator,
+                    inverter_id,
+                    inverter_sn,
+                    station_name,
+                    description,
+                    device_info,
+                )
+            )
+
+    for entity in _build_aggregate_sensors(coordinator, config_entry):
+        wanted.add(entity.unique_id)
+        if entity.unique_id not in known:
+            entities.append(entity)
+
+    return entities, wanted
+
+
+def _build_aggregate_sensors(
+    coordinator: DataUpdateCoordinator, config_entry: ConfigEntry
+) -> list[SolisCloudAggregateSensor]:
+    """Create per-station and account-wide total sensors."""
+    aggregates = coordinator.data.get("aggregates", {})
+    entities = []
+    for station_name in [*aggregates.get("stations", {}), None]:
+        group = SolisCloudAggregateSensor.group(config_entry.entry_id, station_name)
+        for description in AGGREGATE_DESCRIPTIONS:
+            entities.append(
+                SolisCloudAggregateSensor(coordinator, group, station_name, description)
+            )
+    return entities
 
 
 class SolisCloudSensor(CoordinatorEntity, SensorEntity):
@@ -184,39 +364,55 @@ class SolisCloudSensor(CoordinatorEntity, SensorEntity):
         inverter_id: str,
         inverter_sn: str,
         station_name: str,
-        sensor_key: str,
-        sensor_name: str,
-        unit: str | None,
-        device_class: SensorDeviceClass | None,
-        state_class: SensorStateClass | None,
+        description: SensorEntityDescription,
+        device_info: dict,
     ) -> None:
-        """Initialize the sensor."""
+        """Initialize the sensor from its shared description and device info."""
         super().__init__(coordinator)
+        self.entity_description = description
         self._inverter_id = inverter_id
         self._inverter_sn = inverter_sn
-        self._sensor_key = sensor_key
-        self._attr_name = f"{station_name} {sensor_name}"
-        self._attr_unique_id = f"{inverter_sn}_{sensor_key}"
-        self._attr_native_unit_of_measurement = unit
-        self._attr_device_class = device_class
-        self._attr_state_class = state_class
+        self._sensor_key = description.key
+        self._attr_name = f"{station_name} {description.name}"
+        self._attr_unique_id = f"{inverter_sn}_{description.key}"
+        self._attr_device_info = device_info
+        self._written_available: bool | None = None
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Skip the state write when this inverter's payload did not change.
+
+        A failed refresh leaves the previous data in place, so the write is
+        only skipped after a successful one that kept the availability.
+        """
+        data = self.coordinator.data
+        available = self.available
+        if (
+            self.coordinator.last_update_success
+            and available == self._written_available
+            and data
+            and self._unchanged(data)
+        ):
+            return
+        self._written_available = available
+        super()._handle_coordinator_update()
+
+    def _unchanged(self, data: dict) -> bool:
+        """Return True when the state to write is the one written last."""
+        return self._inverter_sn in data.get("unchanged", ())
 
     @property
-    def device_info(self):
-        """Return device information."""
-        return {
-            "identifiers": {(DOMAIN, self._inverter_sn)},
-            "name": f"Solis Inverter {self._inverter_sn}",
-            "manufacturer": "Solis",
-            "model": "Solar Inverter",
-        }
+    def available(self) -> bool:
+        """Return False while this inverter's own fetches are failing."""
+        data = self.coordinator.data
+        return super().available and not (
+            data and self._inverter_sn in data.get("unavailable", ())
+        )
 
     def _get_inverter_data(self) -> dict | None:
         """Find this sensor's inverter data from the coordinator."""
-        if self.coordinator.data and "records" in self.coordinator.data:
-            for inverter in self.coordinator.data["records"]:
-                if inverter.get("id") == self._inverter_id:
-                    return inverter
+        if self.coordinator.data and "index" in self.coordinator.data:
+            return self.coordinator.data["index"].get(self._inverter_sn)
         return None
 
     @property
@@ -229,8 +425,7 @@ class SolisCloudSensor(CoordinatorEntity, SensorEntity):
         value = inverter.get(self._sensor_key)
 
         if self._sensor_key == "state":
-            state_map = {"1": "Online", "2": "Offline", "3": "Alarm"}
-            return state_map.get(str(value), "Unknown")
+            return _STATE_MAP.get(str(value), "Unknown")
 
         return value
 
@@ -263,19 +458,14 @@ class SolisCloudComputedSensor(SolisCloudSensor):
         inverter_id: str,
         inverter_sn: str,
         station_name: str,
-        sensor_key: str,
-        sensor_name: str,
-        source_key: str,
-        unit: str | None,
-        device_class: SensorDeviceClass | None,
-        state_class: SensorStateClass | None,
+        description: SensorEntityDescription,
+        device_info: dict,
     ) -> None:
         """Initialize the computed sensor."""
         super().__init__(
-            coordinator, inverter_id, inverter_sn, station_name,
-            sensor_key, sensor_name, unit, device_class, state_class,
+            coordinator, inverter_id, inverter_sn, station_name, description, device_info,
         )
-        self._source_key = source_key
+        self._source_key = _COMPUTED_SOURCES[description.key]
 
     @property
     def native_value(self):
@@ -301,3 +491,185 @@ class SolisCloudComputedSensor(SolisCloudSensor):
             return max(0, -value)
 
         return None
+
+
+class SolisCloudAggregateSensor(CoordinatorEntity, SensorEntity):
+    """A total over all inverters of a station, or of the whole account."""
+
+    @staticmethod
+    def group(entry_id: str, station_name: str | None) -> tuple[str, str, dict]:
+        """Return the scope id, name prefix and device info of a total group.
+
+        A station_name of None groups every inverter of the account.
+        """
+        if station_name is None:
+            scope_id = f"{entry_id}_account"
+            prefix = "Solis Account Total"
+            device_name = "Solis Account"
+        else:
+            scope_id = f"{entry_id}_station_{slugify(station_name)}"
+            prefix = f"{station_name} Station"
+            device_name = f"Solis Station {station_name}"
+        device_info = {
+            "identifiers": {(DOMAIN, scope_id)},
+            "name": device_name,
+            "manufacturer": "Solis",
+            "model": "Aggregate",
+        }
+        return scope_id, prefix, device_info
+
+    def __init__(
+        self,
+        coordinator: DataUpdateCoordinator,
+        group: tuple[str, str, dict],
+        station_name: str | None,
+        description: SensorEntityDescription,
+    ) -> None:
+        """Initialize the aggregate sensor of a group built by group()."""
+        super().__init__(coordinator)
+        scope_id, prefix, device_info = group
+        self.entity_description = description
+        self._station_name = station_name
+        self._sensor_key = description.key
+        self._written_aggregates = None
+        self._written_available: bool | None = None
+        self._attr_name = f"{prefix} {description.name}"
+        self._attr_unique_id = f"{scope_id}_{description.key}"
+        self._attr_device_info = device_info
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Skip the state write when the aggregates were reused unchanged."""
+        data = self.coordinator.data
+        aggregates = data.get("aggregates") if data else None
+        available = self.available
+        if (
+            self.coordinator.last_update_success
+            and available == self._written_available
+            and aggregates is not None
+            and aggregates is self._written_aggregates
+        ):
+            return
+        self._written_aggregates = aggregates
+        self._written_available = available
+        super()._handle_coordinator_update()
+
+    def _get_aggregate(self) -> dict | None:
+        """Find this sensor's aggregate group from the coordinator."""
+        if not self.coordinator.data:
+            return None
+        aggregates = self.coordinator.data.get("aggregates", {})
+        if self._station_name is None:
+            return aggregates.get("fleet")
+        return aggregates.get("stations", {}).get(self._station_name)
+
+    @property
+    def native_value(self):
+        """Return the aggregated value."""
+        aggregate = self._get_aggregate()
+        if aggregate is None:
+            return None
+        return aggregate.get(self._sensor_key)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the number of inverters in this aggregate."""
+        aggregate = self._get_aggregate()
+        if aggregate is None:
+            return None
+        return {"inverter_count": aggregate.get("inverterCount", 0)}
+
+
+class _SolisCloudValueSensor(SolisCloudSensor):
+    """A sensor whose state does not follow its inverter's payload alone.
+
+    The write is skipped while the value stays the one written last.
+    """
+
+    _written_value = None
+
+    def _unchanged(self, data: dict) -> bool:
+        """Return True when the value is the one written last."""
+        return self.native_value == self._written_value
+
+    @callback
+    def async_write_ha_state(self) -> None:
+        """Write the state and remember its value."""
+        self._written_value = self.native_value
+        super().async_write_ha_state()
+
+
+class SolisCloudIntegratedEnergySensor(_SolisCloudValueSensor):
+    """Energy integrated locally from an inverter's power samples.
+
+    The integrator only moves when a newer sample arrives, which is not
+    always a changed payload, so writes follow the integrated total itself.
+    """
+
+    @property
+    def native_value(self):
+        """Return the integrated energy."""
+        if not self.coordinator.data:
+            return None
+        energy = self.coordinator.data.get("energy", {}).get(self._inverter_sn)
+        if energy is None:
+            return None
+        return energy.get(self._sensor_key)
+
+
+class SolisCloudUploadSensor(_SolisCloudValueSensor):
+    """When the inverter's data logger uploaded the current sample.
+
+    The upload tracker can learn of an upload without a changed payload, so
+    writes follow the upload time itself.
+    """
+
+    @property
+    def native_value(self):
+        """Return the upload time of the current sample."""
+        uploads = getattr(self.coordinator.transport, "uploads", None)
+        if uploads is not None:
+            timestamp = uploads.last_upload(self._inverter_sn)
+        else:
+            inverter = self._get_inverter_data()
+            if inverter is None:
+                return None
+            timestamp = data_timestamp(inverter)
+        if timestamp is None:
+            return None
+        return dt_util.utc_from_timestamp(timestamp)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the learned upload cadence and next expected upload."""
+        uploads = getattr(self.coordinator.transport, "uploads", None)
+        if uploads is None:
+            return None
+        cadence = uploads.cadence(self._inverter_sn)
+        next_expected = uploads.next_expected(self._inverter_sn)
+        return {
+            "upload_interval": round(cadence) if cadence is not None else None,
+            "next_expected_upload": (
+                dt_util.utc_from_timestamp(next_expected).isoformat()
+                if next_expected is not None
+                else None
+            ),
+        }
+
+
+# Every per-inverter sensor in creation order: (description, source key, entity class)
+_INVERTER_ENTITY_TABLE = [
+    *(
+        (SENSOR_DESCRIPTIONS[key], key, SolisCloudSensor)
+        for key in SENSOR_KEYS
+    ),
+    *(
+        (SENSOR_DESCRIPTIONS[key], source_key, SolisCloudComputedSensor)
+        for key, source_key in _COMPUTED_SOURCES.items()
+    ),
+    *(
+        (SENSOR_DESCRIPTIONS[key], _INTEGRATED_SOURCES[key], SolisCloudIntegratedEnergySensor)
+        for key, _ in INTEGRATED_SENSOR_DEFINITIONS
+    ),
+    (SENSOR_DESCRIPTIONS[TIMESTAMP_KEY], TIMESTAMP_KEY, SolisCloudUploadSensor),
+]
@@ -0,0 +1,263 @@
+"""Services for the Solis Cloud integration."""
+from __future__ import annotations
+
+import os
+import time
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .api import SolisCloudAPI
+from .const import (
+    DOMAIN,
+    SERVICE_EXPORT_HISTORY,
+    SERVICE_QUERY_HISTORY,
+    SERVICE_READ_SETTING,
+    SERVICE_RECORD_RESPONSES,
+    SERVICE_SET_PROFILER,
+    SERVICE_WRITE_SETTING,
+)
+from .export import GRANULARITY_REPORTS, export_history
+from .profiling import PROFILER_MODES
+from .recorder import ResponseRecorder
+
+QUERY_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Required("serial"): cv.string,
+        vol.Required("start"): cv.datetime,
+        vol.Required("end"): cv.datetime,
+        vol.Optional("keys"): vol.All(cv.ensure_list, [cv.string]),
+    }
+)
+
+SET_PROFILER_SCHEMA = vol.Schema(
+    {
+        vol.Required("mode"): vol.In(PROFILER_MODES),
+    }
+)
+
+EXPORT_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Required("start"): cv.date,
+        vol.Required("end"): cv.date,
+        vol.Optional("granularity", default="day"): vol.In(list(GRANULARITY_REPORTS)),
+    }
+)
+
+WRITE_SETTING_SCHEMA = vol.Schema(
+    {
+        vol.Required("serial"): cv.string,
+        vol.Required("cid"): cv.positive_int,
+        vol.Required("value"): cv.string,
+        vol.Optional("verify_key"): cv.string,
+    }
+)
+
+READ_SETTING_SCHEMA = vol.Schema(
+    {
+        vol.Required("serial"): cv.string,
+        vol.Required("cid"): cv.positive_int,
+    }
+)
+
+RECORD_RESPONSES_SCHEMA = vol.Schema(
+    {
+        vol.Optional("polls", default=10): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=1000)
+        ),
+    }
+)
+
+
+def _coordinators(hass: HomeAssistant) -> list:
+    """Return the coordinators of all loaded config entries."""
+    return list(hass.data.get(DOMAIN, {}).values())
+
+
+def _controlling_coordinator(hass: HomeAssistant, serial: str):
+    """Return the coordinator of the cloud account that lists an inverter."""
+    for coordinator in _coordinators(hass):
+        transport = coordinator.transport
+        if isinstance(transport, SolisCloudAPI) and serial in transport.inverter_serials:
+            return coordinator
+    raise HomeAssistantError(f"No Solis Cloud account lists inverter {serial}")
+
+
+async def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration's services."""
+
+    async def async_query_history(call: ServiceCall) -> ServiceResponse:
+        """Return locally recorded samples for one inverter."""
+        serial = call.data["serial"]
+        # Naive times are in Home Assistant's time zone
+        start = dt_util.as_utc(call.data["start"]).timestamp()
+        end = dt_util.as_utc(call.data["end"]).timestamp()
+        keys = call.data.get("keys")
+
+        coordinators = [
+            coordinator for coordinator in _coordinators(hass)
+            if serial in coordinator.transport.inverter_serials
+        ]
+        if not coordinators:
+            raise HomeAssistantError(f"No Solis Cloud entry lists inverter {serial}")
+
+        for coordinator in coordinators:
+            if coordinator.history is None:
+                continue
+            try:
+                result = await hass.async_add_executor_job(
+                    coordinator.history.query, serial, start, end, keys
+                )
+            except ValueError as err:
+                raise HomeAssistantError(str(err)) from err
+            if result["timestamp"]:
+                return result
+        return {"timestamp": []}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_QUERY_HISTORY,
+        async_query_history,
+        schema=QUERY_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def async_set_profiler(call: ServiceCall) -> None:
+        """Switch profiling of every config entry at runtime."""
+        directory = hass.config.path(f"{DOMAIN}_profiles")
+        for coordinator in _coordinators(hass):
+            try:
+                coordinator.transport.profiler.set_mode(call.data["mode"], directory)
+            except ValueError as err:
+                raise HomeAssistantError(str(err)) from err
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_PROFILER,
+        async_set_profiler,
+        schema=SET_PROFILER_SCHEMA,
+    )
+
+    async def async_export_history(call: ServiceCall) -> ServiceResponse:
+        """Export energy reports of every cloud inverter to gzip CSV files."""
+        start = call.data["start"]
+        end = call.data["end"]
+        granularity = call.data["granularity"]
+        if end < start:
+            raise HomeAssistantError("End date is before start date")
+
+        directory = hass.config.path(f"{DOMAIN}_exports")
+        await hass.async_add_executor_job(os.makedirs, directory, 0o755, True)
+
+        files = []
+        for coordinator in _coordinators(hass):
+            api = coordinator.transport
+            if not isinstance(api, SolisCloudAPI):
+                continue
+            path = os.path.join(
+                directory,
+                f"{granularity}_{start.isoformat()}_{end.isoformat()}"
+                f"_{coordinator.config_entry.entry_id}.csv.gz",
+            )
+            rows, failed = await hass.async_add_executor_job(
+                export_history, api, path, granularity, start, end, api.max_workers
+            )
+            files.append({"path": path, "rows": rows, "failed": failed})
+
+        if not files:
+            raise HomeAssistantError("No Solis Cloud account is configured")
+        return {"files": files}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_HISTORY,
+        async_export_history,
+        schema=EXPORT_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def async_write_setting(call: ServiceCall) -> ServiceResponse:
+        """Queue a setting write, sent with the next refresh."""
+        serial = call.data["serial"]
+        cid = call.data["cid"]
+        coordinator = _controlling_coordinator(hass, serial)
+        control = coordinator.transport.control
+        queued = control.submit(
+            serial, cid, call.data["value"], call.data.get("verify_key"), time.time()
+        )
+        if queued:
+            await coordinator.async_request_refresh()
+        return {"queued": queued, "status": control.status(serial, cid)}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_WRITE_SETTING,
+        async_write_setting,
+        schema=WRITE_SETTING_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def async_read_setting(call: ServiceCall) -> ServiceResponse:
+        """Read a setting from the inverter and report its latest write."""
+        serial = call.data["serial"]
+        cid = call.data["cid"]
+        coordinator = _controlling_coordinator(hass, serial)
+        api = coordinator.transport
+        try:
+            value = await hass.async_add_executor_job(api.read_setting, serial, cid)
+        except Exception as err:
+            raise HomeAssistantError(f"Error reading setting {cid}: {err}") from err
+        return {"value": value, "write": api.control.status(serial, cid)}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_READ_SETTING,
+        async_read_setting,
+        schema=READ_SETTING_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def async_record_responses(call: ServiceCall) -> ServiceResponse:
+        """Capture the raw responses of the next polls of every cloud account."""
+        directory = hass.config.path(f"{DOMAIN}_captures")
+        await hass.async_add_executor_job(os.makedirs, directory, 0o755, True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+
+        files = []
+        for coordinator in _coordinators(hass):
+            api = coordinator.transport
+            if not isinstance(api, SolisCloudAPI):
+                continue
+            path = os.path.join(
+                directory, f"{coordinator.config_entry.entry_id}_{stamp}.jsonl.gz"
+            )
+            recorder = await hass.async_add_executor_job(
+                ResponseRecorder, path, call.data["polls"]
+            )
+            previous = api.recorder
+            api.start_recording(recorder)
+            if previous is not None:
+                await hass.async_add_executor_job(previous.close)
+            await coordinator.async_request_refresh()
+            files.append({"path": path})
+
+        if not files:
+            raise HomeAssistantError("No Solis Cloud account is configured")
+        return {"files": files}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_RECORD_RESPONSES,
+        async_record_responses,
+        schema=RECORD_RESPONSES_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
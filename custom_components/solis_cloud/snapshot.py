@@ -0,0 +1,206 @@
+"""Latest inverter snapshot in a memory-mapped file for other local processes.
+
+The file holds, after a 64 byte header, fixed 32 byte ASCII names of every key
+in SENSOR_DEFINITIONS and of every inverter slot, one float64 sample time per
+slot, and a float64 matrix of values with one row per slot and one column per
+key, NaN where the API reported nothing. Everything is little endian.
+
+The header's sequence counter is odd while a poll is being written and even
+once it is complete. A reader copies what it needs and accepts the copy when
+the sequence was the same even number before and after. Readers remap the
+file when the capacity in the header differs from their mapping.
+"""
+from __future__ import annotations
+
+import math
+import mmap
+import os
+import struct
+import zlib
+from typing import Any
+
+from .freshness import sample_time
+from .values import as_float
+
+MAGIC = b"SLSS"
+VERSION = 1
+
+# magic, version, key count, slot capacity, inverter count, sequence, poll time, key checksum
+_HEADER = struct.Struct("<4sHHIIQdI")
+HEADER_SIZE = 64
+_SEQUENCE = struct.Struct("<Q")
+_SEQUENCE_OFFSET = 16
+
+NAME_SIZE = 32
+MIN_CAPACITY = 16
+
+_TIME = struct.Struct("<d")
+
+
+def _name(value: str) -> bytes:
+    """Return a fixed size, NUL padded name."""
+    return value.encode("ascii", "replace")[:NAME_SIZE].ljust(NAME_SIZE, b"\0")
+
+
+class SnapshotLayout:
+    """Byte offsets of the snapshot sections for a key count and capacity."""
+
+    def __init__(self, key_count: int, capacity: int) -> None:
+        """Compute the section offsets."""
+        self.key_count = key_count
+        self.capacity = capacity
+        self.keys_offset = HEADER_SIZE
+        self.serials_offset = self.keys_offset + key_count * NAME_SIZE
+        self.times_offset = self.serials_offset + capacity * NAME_SIZE
+        self.values_offset = self.times_offset + capacity * _TIME.size
+        self.row_size = key_count * 8
+        self.size = self.values_offset + capacity * self.row_size
+
+    def serial_offset(self, slot: int) -> int:
+        """Return the offset of a slot's serial number."""
+        return self.serials_offset + slot * NAME_SIZE
+
+    def time_offset(self, slot: int) -> int:
+        """Return the offset of a slot's sample time."""
+        return self.times_offset + slot * _TIME.size
+
+    def row_offset(self, slot: int) -> int:
+        """Return the offset of a slot's values."""
+        return self.values_offset + slot * self.row_size
+
+
+class SnapshotExport:
+    """Writer of the snapshot file; written from the polling thread."""
+
+    def __init__(self, path: str, keys: tuple[str, ...]) -> None:
+        """Initialize the writer; the file is created on the first write."""
+        self.path = path
+        self.keys = keys
+        self._row = struct.Struct(f"<{len(keys)}d")
+        self._checksum = zlib.crc32(",".join(keys).encode("utf-8"))
+        self._layout: SnapshotLayout | None = None
+        self._mm: mmap.mmap | None = None
+        self._sequence = 0
+        self._slots: list[str | None] = []
+
+    def _open(self, capacity: int) -> None:
+        """Create or grow the file to hold capacity inverters."""
+        if self._mm is not None:
+            self._mm.close()
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            header = os.pread(fd, _HEADER.size, 0)
+            if len(header) == _HEADER.size:
+                magic, _, key_count, stored_capacity, *_ = _HEADER.unpack(header)
+                if magic == MAGIC and key_count == len(self.keys):
+                    # Never shrink the file under readers that mapped it
+                    capacity = max(capacity, stored_capacity)
+            layout = SnapshotLayout(len(self.keys), capacity)
+            if os.fstat(fd).st_size < layout.size:
+                os.ftruncate(fd, layout.size)
+            self._mm = mmap.mmap(fd, layout.size)
+        finally:
+            os.close(fd)
+        if self._layout is None and _HEADER.unpack_from(self._mm, 0)[0] == MAGIC:
+            # Keep the sequence increasing across restarts
+            sequence = _SEQUENCE.unpack_from(self._mm, _SEQUENCE_OFFSET)[0]
+            self._sequence = sequence + sequence % 2
+        self._layout = layout
+        # Rows move when the layout changes, so every slot is rewritten
+        self._slots = [None] * capacity
+        for index, key in enumerate(self.keys):
+            self._mm[
+                layout.keys_offset + index * NAME_SIZE:layout.keys_offset + (index + 1) * NAME_SIZE
+            ] = _name(key)
+
+    def _write_header(self, count: int, poll_time: float) -> None:
+        """Write the header with the current sequence."""
+        _HEADER.pack_into(
+            self._mm, 0, MAGIC, VERSION, len(self.keys), self._layout.capacity,
+            count, self._sequence, poll_time, self._checksum,
+        )
+
+    def write(
+        self, poll_time: float, records: list[dict[str, Any]], unchanged: set[str]
+    ) -> None:
+        """Publish the records of a poll.
+
+        Rows of inverters whose record did not change are left as they are.
+        """
+        if self._layout is None or len(records) > self._layout.capacity:
+            self._open(max(MIN_CAPACITY, len(records) * 2))
+        layout = self._layout
+        mm = self._mm
+
+        self._sequence += 1
+        _SEQUENCE.pack_into(mm, _SEQUENCE_OFFSET, self._sequence)
+
+        for slot, record in enumerate(records):
+            inverter_sn = record.get("inverterSn") or ""
+            moved = self._slots[slot] != inverter_sn
+            if moved:
+                offset = layout.serial_offset(slot)
+                mm[offset:offset + NAME_SIZE] = _name(inverter_sn)
+                self._slots[slot] = inverter_sn
+            if moved or inverter_sn not in unchanged:
+                _TIME.pack_into(mm, layout.time_offset(slot), sample_time(record, poll_time))
+                self._row.pack_into(
+                    mm, layout.row_offset(slot),
+                    *(as_float(record.get(key), math.nan) for key in self.keys),
+                )
+        for slot in range(len(records), layout.capacity):
+            if self._slots[slot] is not None:
+                offset = layout.serial_offset(slot)
+                mm[offset:offset + NAME_SIZE] = _name("")
+                self._slots[slot] = None
+
+        self._sequence += 1
+        self._write_header(len(records), poll_time)
+
+    def close(self) -> None:
+        """Unmap the file, leaving the last snapshot for readers."""
+        if self._mm is not None:
+            self._mm.flush()
+            self._mm.close()
+            self._mm = None
+            self._layout = None
+
+
+def read_snapshot(path: str, retries: int = 10) -> dict[str, Any] | None:
+    """Return a consistent copy of a snapshot file, for Python readers.
+
+    Returns None when no complete snapshot could be read.
+    """
+    with open(path, "rb") as file:
+        mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        for _ in range(retries):
+            if len(mm) < HEADER_SIZE:
+                return None
+            magic, version, key_count, capacity, count, sequence, poll_time, _ = (
+                _HEADER.unpack_from(mm, 0)
+            )
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a Solis Cloud snapshot")
+            layout = SnapshotLayout(key_count, capacity)
+            if sequence % 2 or len(mm) < layout.size:
+                continue
+            copy = bytes(mm[:layout.size])
+            if _SEQUENCE.unpack_from(mm, _SEQUENCE_OFFSET)[0] != sequence:
+                continue
+
+            def name(offset: int) -> str:
+                return copy[offset:offset + NAME_SIZE].rstrip(b"\0").decode("ascii")
+
+            row = struct.Struct(f"<{key_count}d")
+            return {
+                "sequence": sequence,
+                "time": poll_time,
+                "keys": [name(layout.keys_offset + index * NAME_SIZE) for index in range(key_count)],
+                "serials": [name(layout.serial_offset(slot)) for slot in range(count)],
+                "times": [_TIME.unpack_from(copy, layout.time_offset(slot))[0] for slot in range(count)],
+                "values": [list(row.unpack_from(copy, layout.row_offset(slot))) for slot in range(count)],
+            }
+        return None
+    finally:
+        mm.close()
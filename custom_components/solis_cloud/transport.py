@@ -0,0 +1,105 @@
+"""Data source interface used by the coordinator."""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from typing import Any
+
+from .const import DEFAULT_SCAN_INTERVAL
+from .profiling import Profiler
+from .windows import PollPlan
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_MAX_WORKERS = 4
+
+
+def payload_fingerprint(payload: dict[str, Any], keys: tuple[str, ...]) -> int:
+    """Hash the values of the given keys, ignoring everything else."""
+    values = tuple(payload.get(key) for key in keys)
+    try:
+        return hash(values)
+    except TypeError:
+        return hash(repr(values))
+
+
+class InverterTransport(ABC):
+    """A source of inverter records keyed like SENSOR_DEFINITIONS.
+
+    get_inverter_data returns {"records": [...]} where every record carries
+    "id", "inverterSn" and "stationName" plus the API keys it could read.
+    It may also return "unchanged", the serials whose record is the same
+    object as in the previous fetch because the payload did not change, and
+    "unavailable", the serials whose latest fetch failed.
+    """
+
+    # Polling interval bounds in seconds, used by the coordinator and options
+    default_scan_interval = DEFAULT_SCAN_INTERVAL
+    min_scan_interval = 30
+
+    def __init__(self, profiler: Profiler) -> None:
+        """Initialize the shared transport settings."""
+        self.profiler = profiler
+        self.scan_interval: float = self.default_scan_interval
+        self.timeout = DEFAULT_TIMEOUT
+        self.max_workers = DEFAULT_MAX_WORKERS
+        self.excluded_serials: set[str] = set()
+        # Serial numbers of every inverter seen, including excluded ones
+        self.inverter_serials: list[str] = []
+        # Keys compared between polls; None disables fingerprinting
+        self.fingerprint_keys: tuple[str, ...] | None = None
+        self._previous: dict[str, tuple[int, dict[str, Any]]] = {}
+
+    def _previous_record(self, inverter_sn: str) -> dict[str, Any] | None:
+        """Return the record built for an inverter by an earlier fetch."""
+        previous = self._previous.get(inverter_sn)
+        return None if previous is None else previous[1]
+
+    def _reuse_unchanged(
+        self,
+        inverter_sn: str,
+        payload: dict[str, Any],
+        build: Callable[[], dict[str, Any]],
+        unchanged: set[str],
+    ) -> dict[str, Any]:
+        """Return the previous record when the payload fingerprint is unchanged.
+
+        Otherwise build the record and remember it with its fingerprint.
+        """
+        keys = self.fingerprint_keys
+        if keys is None:
+            return build()
+        fingerprint = payload_fingerprint(payload, keys)
+        previous = self._previous.get(inverter_sn)
+        if previous is not None and previous[0] == fingerprint:
+            unchanged.add(inverter_sn)
+            return previous[1]
+        record = build()
+        self._previous[inverter_sn] = (fingerprint, record)
+        return record
+
+    @property
+    def tick_interval(self) -> float:
+        """Return how often the coordinator should call get_inverter_data."""
+        return self.scan_interval
+
+    def set_scan_interval(self, seconds: float) -> None:
+        """Set how often each inverter should be polled."""
+        self.scan_interval = seconds
+
+    def max_poll_interval(self) -> float:
+        """Return the longest time expected between two polls of an inverter."""
+        return self.scan_interval
+
+    def set_poll_plan(self, plan: PollPlan | None) -> None:
+        """Apply a daily polling plan; transports without a budget ignore it."""
+
+    def overhead_requests(self, seconds: float) -> int:
+        """Return the requests other than detail fetches expected in seconds."""
+        return 0
+
+    @abstractmethod
+    def get_inverter_data(self) -> dict[str, Any]:
+        """Fetch the current record of every inverter; runs in the executor."""
+
+    def close(self) -> None:
+        """Release connections held by the transport."""
@@ -0,0 +1,45 @@
+"""Numeric API values and the units the API names in "<key>Str" fields.
+
+The API reports numbers as strings or numbers, and scales large power and
+energy values to bigger units, so every consumer parses them the same way.
+"""
+from __future__ import annotations
+
+from typing import Any
+
+# Factors to watts of the power units
+POWER_FACTORS = {"w": 1.0, "kw": 1000.0, "mw": 1000000.0}
+
+# Factors to kWh of the energy units
+ENERGY_FACTORS = {"wh": 0.001, "kwh": 1.0, "mwh": 1000.0, "gwh": 1000000.0}
+
+
+def as_float(value: Any, default: float | None = None) -> float | None:
+    """Coerce an API value to float, returning default when not numeric."""
+    if value is None or value == "":
+        return default
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return default
+
+
+def unit_factor(record: dict[str, Any], key: str, factors: dict[str, float]) -> float:
+    """Return the factor of the unit named in a record's "<key>Str" field."""
+    unit = record.get(f"{key}Str")
+    if isinstance(unit, str):
+        return factors.get(unit.strip().lower(), 1.0)
+    return 1.0
+
+
+def power_watts(record: dict[str, Any], key: str) -> float | None:
+    """Return a power value in watts, or None when not numeric."""
+    value = as_float(record.get(key))
+    if value is None:
+        return None
+    return value * unit_factor(record, key, POWER_FACTORS)
+
+
+def to_kwh(record: dict[str, Any], key: str, value: float) -> float:
+    """Normalise an energy value of a record's key to kWh."""
+    return value * unit_factor(record, key, ENERGY_FACTORS)
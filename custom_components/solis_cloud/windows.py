@@ -0,0 +1,128 @@
+"""Daily plan of faster polling around sunrise, sunset and tariff changes.
+
+Battery modes and production switch around a few predictable moments of the
+day. The plan polls faster inside a window around each of them and slower
+elsewhere, so the requests of the whole day stay within a budget. Without a
+configured budget the day's total matches polling at the fixed interval.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, time as dt_time
+
+# Seconds before and after each transition polled faster
+WINDOW_MARGIN = 20 * 60
+
+# Inside windows the polling interval is divided by this
+WINDOW_SPEEDUP = 5
+
+# Windows may use at most this share of the day's polls
+WINDOW_SHARE = 0.5
+
+# Outside windows inverters are polled at least this often, in seconds
+MAX_SLOW_INTERVAL = 3600
+
+# Share of the budget left for setting writes, reads and history exports
+BUDGET_MARGIN = 0.05
+
+
+def parse_times(value: str) -> list[dt_time]:
+    """Parse comma separated HH:MM times; raise ValueError when invalid."""
+    times = []
+    for part in value.split(","):
+        part = part.strip()
+        if part:
+            times.append(datetime.strptime(part, "%H:%M").time())
+    return times
+
+
+@dataclass(frozen=True)
+class PollPlan:
+    """Polling intervals from start until end, in unix seconds."""
+
+    start: float
+    end: float
+    # Sorted, non-overlapping (start, end) windows
+    windows: tuple[tuple[float, float], ...]
+    fast_interval: float
+    slow_interval: float
+    # Detail requests allowed until end, or None for no hard limit
+    budget: int | None
+
+    def window_at(self, now: float) -> tuple[float, float] | None:
+        """Return the window containing now, if any."""
+        for window in self.windows:
+            if window[0] <= now < window[1]:
+                return window
+        return None
+
+    def interval_at(self, now: float) -> float:
+        """Return the per-inverter polling interval at now."""
+        return self.fast_interval if self.window_at(now) else self.slow_interval
+
+    def next_window_start(self, now: float) -> float | None:
+        """Return when the next window after now opens."""
+        for window_start, _ in self.windows:
+            if window_start > now:
+                return window_start
+        return None
+
+
+def _merge_windows(
+    transitions: list[float], start: float, end: float, margin: float
+) -> tuple[tuple[float, float], ...]:
+    """Return the windows around transitions, merged and clipped to start..end."""
+    windows: list[list[float]] = []
+    for moment in sorted(transitions):
+        window_start = max(moment - margin, start)
+        window_end = min(moment + margin, end)
+        if window_start >= window_end:
+            continue
+        if windows and window_start <= windows[-1][1]:
+            windows[-1][1] = max(windows[-1][1], window_end)
+        else:
+            windows.append([window_start, window_end])
+    return tuple((window[0], window[1]) for window in windows)
+
+
+def plan_day(
+    transitions: list[float],
+    start: float,
+    end: float,
+    base_interval: float,
+    min_interval: float,
+    inverters: int,
+    daily_budget: int | None,
+    overhead: int = 0,
+) -> PollPlan:
+    """Plan the polling intervals from start until the end of the day.
+
+    daily_budget counts every request over a full day for all inverters;
+    the part of the day from start to end gets its proportional share. The
+    plan's budget is what remains for detail requests once the overhead
+    requests expected until end and a margin for other traffic are set aside.
+    """
+    windows = _merge_windows(transitions, start, end, WINDOW_MARGIN)
+    inside = sum(window_end - window_start for window_start, window_end in windows)
+    outside = (end - start) - inside
+    inverters = max(inverters, 1)
+
+    budget = None
+    if daily_budget:
+        share = daily_budget * (end - start) / 86400
+        budget = max(int(share * (1 - BUDGET_MARGIN)) - overhead, 0)
+        polls = budget / inverters
+    else:
+        # The same number of polls as the fixed interval would make
+        polls = (end - start) / base_interval
+
+    fast = max(min_interval, base_interval / WINDOW_SPEEDUP)
+    if inside and polls:
+        fast = max(fast, inside / (polls * WINDOW_SHARE))
+    remaining = polls - (inside / fast if inside else 0)
+    slow = base_interval
+    if outside:
+        slow = outside / remaining if remaining > 0 else MAX_SLOW_INTERVAL
+        slow = min(max(slow, base_interval), MAX_SLOW_INTERVAL)
+
+    return PollPlan(start, end, windows, fast, slow, budget)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Replay a recorded Solis Cloud capture through the sensor pipeline offline.
+
+Feeds every poll of a capture written by the solis_cloud.record_responses
+service through get_inverter_data, counter validation, energy integration,
+station totals and the sensor entities, as fast as possible. Prints the
+throughput, and optionally writes every sensor state per poll for comparing
+mappings before and after a change. Requires homeassistant to be installed.
+"""
+import argparse
+import json
+import time
+from types import SimpleNamespace
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.solis_cloud.aggregate import DailyTotals, compute_aggregates
+from custom_components.solis_cloud.energy import EnergyIntegrator
+from custom_components.solis_cloud.integrity import CounterValidator
+from custom_components.solis_cloud.recorder import read_capture
+from custom_components.solis_cloud.replay import ReplayAPI
+from custom_components.solis_cloud.sensor import (
+    COUNTER_KEYS,
+    SENSOR_KEY_NAMES,
+    SENSOR_KEYS,
+    _build_entities,
+)
+
+
+def replay(path, states_file=None):
+    """Replay one capture; return (polls, records, seconds in the pipeline)."""
+    api = ReplayAPI()
+    api.fingerprint_keys = SENSOR_KEYS
+    validator = CounterValidator(COUNTER_KEYS)
+    integrator = EnergyIntegrator()
+    daily_totals = DailyTotals()
+    coordinator = SimpleNamespace(
+        data=None,
+        sensor_keys=set(SENSOR_KEY_NAMES),
+        config_generation=0,
+        last_update_success=True,
+        transport=api,
+    )
+    config_entry = SimpleNamespace(entry_id="replay")
+    known = {}
+    polls = records = 0
+    elapsed = 0.0
+
+    for poll in read_capture(path):
+        poll_time = poll["time"]
+        start = time.perf_counter()
+        api.load_poll(poll)
+        data = api.get_inverter_data()
+        changed = [
+            record for record in data["records"]
+            if record.get("inverterSn") not in data["unchanged"]
+        ]
+        local_time = dt_util.as_local(dt_util.utc_from_timestamp(poll_time))
+        validator.process(changed, local_time)
+        integrator.process(data["records"], poll_time)
+        data["energy"] = integrator.totals()
+        daily_totals.process(changed, local_time.date())
+        data["aggregates"] = compute_aggregates(data["records"], daily_totals)
+        data["index"] = {record.get("inverterSn"): record for record in data["records"]}
+        coordinator.data = data
+
+        entities, _ = _build_entities(coordinator, config_entry, known)
+        known.update((entity.unique_id, entity) for entity in entities)
+        states = {
+            unique_id: entity.native_value for unique_id, entity in known.items()
+        }
+        elapsed += time.perf_counter() - start
+
+        polls += 1
+        records += len(data["records"])
+        if states_file is not None:
+            states_file.write(json.dumps({"time": poll_time, "states": states}, default=str))
+            states_file.write("\n")
+
+    return polls, records, elapsed
+
+
+def main():
+    """Replay a capture and report the throughput."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("capture", help="capture file (.jsonl.gz)")
+    parser.add_argument("--states", help="write sensor states per poll to this JSON lines file")
+    parser.add_argument("--rounds", type=int, default=1, help="replay the capture this many times")
+    args = parser.parse_args()
+
+    states_file = open(args.states, "w", encoding="utf-8") if args.states else None
+    try:
+        best = None
+        for round_no in range(args.rounds):
+            result = replay(args.capture, states_file if round_no == 0 else None)
+            if best is None or result[2] < best[2]:
+                best = result
+    finally:
+        if states_file is not None:
+            states_file.close()
+
+    polls, records, elapsed = best
+    print("=" * 60)
+    print(f"Polls:    {polls}")
+    print(f"Records:  {records}")
+    print(f"Pipeline: {elapsed * 1000:.1f} ms (best of {args.rounds})")
+    if elapsed:
+        print(f"Throughput: {polls / elapsed:.1f} polls/s, {records / elapsed:.0f} records/s")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
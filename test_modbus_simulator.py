@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Check the Modbus register mapping against a simulated inverter.
+
+Serves known input register values from a minimal Modbus TCP server on
+localhost, reads them through SolisModbusTransport with the real pymodbus
+client, and checks that plan_blocks covers every mapped register and that
+decode_registers returns the expected value for every key. Requires
+homeassistant and pymodbus to be installed.
+"""
+import socketserver
+import struct
+import sys
+import threading
+
+from custom_components.solis_cloud.modbus import (
+    MAX_BLOCK_SIZE,
+    REGISTER_MAP,
+    S32,
+    U32,
+    SolisModbusTransport,
+    plan_blocks,
+)
+
+SLAVE = 1
+SERIAL = "SIMULATED01"
+
+# Raw register values served for some keys; the others get their address
+RAW_VALUES = {
+    "pac": 5230,
+    "psum": -1234,
+    "batteryCurrent": -152,
+    "batteryDirection": 1,
+    "batteryPower": 1800,
+    "inverterTemperature": -45,
+    "eTotal": 123456,
+    "batteryCapacitySoc": 87,
+    "fac": 5002,
+}
+
+
+def encode(kind, value):
+    """Return the big-endian registers of a value."""
+    if kind in (S32, U32):
+        value &= 0xFFFFFFFF
+        return [value >> 16, value & 0xFFFF]
+    return [value & 0xFFFF]
+
+
+def simulated_registers():
+    """Return the served registers and the raw value of every key."""
+    registers = {}
+    raw = {}
+    for key, address, kind, _ in REGISTER_MAP:
+        raw[key] = RAW_VALUES.get(key, address % 1000)
+        for offset, word in enumerate(encode(kind, raw[key])):
+            registers[address + offset] = word
+    return registers, raw
+
+
+def expected_record(raw):
+    """Return the record the mapping should produce from the raw values."""
+    record = {}
+    for key, _, _, scale in REGISTER_MAP:
+        record[key] = raw[key] * scale
+    if record.pop("batteryDirection") == 1:
+        record["batteryPower"] = -record["batteryPower"]
+    for string in range(1, 5):
+        # String power is computed with 0.1 W resolution
+        record[f"pow{string}"] = round(record[f"uPv{string}"] * record[f"iPv{string}"], 1)
+    return record
+
+
+class InputRegisterHandler(socketserver.BaseRequestHandler):
+    """Answer read input registers requests (function 4) from self.server."""
+
+    def handle(self):
+        while True:
+            header = self.request.recv(7)
+            if len(header) < 7:
+                return
+            transaction, protocol, length, unit = struct.unpack(">HHHB", header)
+            pdu = self.request.recv(length - 1)
+            function, start, count = struct.unpack(">BHH", pdu[:5])
+            self.server.reads.append((start, count))
+            if function != 4 or unit != SLAVE:
+                reply = struct.pack(">BB", function | 0x80, 1)
+            else:
+                words = [self.server.registers.get(start + index, 0) for index in range(count)]
+                reply = struct.pack(f">BB{count}H", function, count * 2, *words)
+            self.request.sendall(
+                struct.pack(">HHHB", transaction, protocol, len(reply) + 1, unit) + reply
+            )
+
+
+def check_blocks():
+    """Return problems with the planned register blocks."""
+    problems = []
+    blocks = plan_blocks()
+    covered = set()
+    for start, count in blocks:
+        if count > MAX_BLOCK_SIZE:
+            problems.append(f"block {start} reads {count} registers")
+        covered.update(range(start, start + count))
+    for key, address, kind, _ in REGISTER_MAP:
+        width = 2 if kind in (S32, U32) else 1
+        if not covered.issuperset(range(address, address + width)):
+            problems.append(f"{key} at {address} is not read")
+    return problems
+
+
+def check_transport(port, raw):
+    """Return problems with the record read from the simulator."""
+    problems = []
+    transport = SolisModbusTransport("127.0.0.1", port, SLAVE, SERIAL, "Simulator")
+    try:
+        record = transport.get_inverter_data()["records"][0]
+    finally:
+        transport.close()
+
+    for key, value in expected_record(raw).items():
+        actual = record.get(key)
+        if actual is None or abs(actual - value) > 0.01:
+            problems.append(f"{key}: expected {value}, got {actual}")
+    if record.get("inverterSn") != SERIAL:
+        problems.append(f"inverterSn: expected {SERIAL}, got {record.get('inverterSn')}")
+    if "batteryDirection" in record:
+        problems.append("batteryDirection was not consumed")
+    return problems
+
+
+def main():
+    """Serve the simulated registers and check the mapping."""
+    registers, raw = simulated_registers()
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), InputRegisterHandler)
+    server.daemon_threads = True
+    server.registers = registers
+    server.reads = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        problems = check_blocks()
+        problems += check_transport(server.server_address[1], raw)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    if server.reads != plan_blocks():
+        problems.append(f"reads {server.reads} differ from the plan {plan_blocks()}")
+
+    print("=" * 60)
+    print(f"Registers mapped: {len(REGISTER_MAP)}")
+    print(f"Blocks read:      {len(server.reads)} {server.reads}")
+    for problem in problems:
+        print(f"FAIL {problem}")
+    print("OK" if not problems else f"{len(problems)} problem(s)")
+    print("=" * 60)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())